@@ -0,0 +1,40 @@
+"""add carts expired partial index
+
+Revision ID: c8e2f5a1d7b4
+Revises: b1c4e7d2a9f3
+Create Date: 2026-10-16 11:03:27.846310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e2f5a1d7b4'
+down_revision: Union[str, None] = 'b1c4e7d2a9f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'carts_expired_idx',
+            'carts',
+            ['expires_at'],
+            unique=False,
+            postgresql_where=sa.text('is_active'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'carts_expired_idx',
+            table_name='carts',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,125 @@
+"""add product reserved quantity
+
+Revision ID: d4a9b3e6f182
+Revises: c8e2f5a1d7b4
+Create Date: 2026-10-16 12:21:09.318452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9b3e6f182'
+down_revision: Union[str, None] = 'c8e2f5a1d7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'products',
+        sa.Column('reserved_quantity', sa.Integer(), server_default='0', nullable=False),
+    )
+
+    op.execute(
+        """
+        UPDATE products p
+        SET reserved_quantity = r.quantity
+        FROM (
+            SELECT ci.product_id, SUM(ci.quantity) AS quantity
+            FROM cart_items ci
+            JOIN carts c ON c.id = ci.cart_id
+            WHERE c.is_active
+            GROUP BY ci.product_id
+        ) r
+        WHERE p.id = r.product_id
+        """
+    )
+
+    # Изменения позиций активной корзины сразу отражаются в products.reserved_quantity
+    op.execute(
+        """
+        CREATE FUNCTION cart_items_reserved_quantity() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE products p
+                SET reserved_quantity = p.reserved_quantity - OLD.quantity
+                FROM carts c
+                WHERE p.id = OLD.product_id AND c.id = OLD.cart_id AND c.is_active;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE products p
+                SET reserved_quantity = p.reserved_quantity + NEW.quantity
+                FROM carts c
+                WHERE p.id = NEW.product_id AND c.id = NEW.cart_id AND c.is_active;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER cart_items_reserved_quantity
+        AFTER INSERT OR UPDATE OF quantity, product_id, cart_id OR DELETE ON cart_items
+        FOR EACH ROW EXECUTE FUNCTION cart_items_reserved_quantity()
+        """
+    )
+
+    # Деактивация или удаление корзины снимает все её резервы, активация - возвращает.
+    # BEFORE DELETE: позиции удаляются каскадно уже после строки корзины
+    op.execute(
+        """
+        CREATE FUNCTION carts_reserved_quantity() RETURNS trigger AS $$
+        DECLARE
+            sign integer;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                IF NOT OLD.is_active THEN
+                    RETURN OLD;
+                END IF;
+                sign := -1;
+            ELSIF OLD.is_active = NEW.is_active THEN
+                RETURN NEW;
+            ELSIF NEW.is_active THEN
+                sign := 1;
+            ELSE
+                sign := -1;
+            END IF;
+
+            UPDATE products p
+            SET reserved_quantity = p.reserved_quantity + sign * r.quantity
+            FROM (
+                SELECT product_id, SUM(quantity) AS quantity
+                FROM cart_items
+                WHERE cart_id = OLD.id
+                GROUP BY product_id
+            ) r
+            WHERE p.id = r.product_id;
+
+            IF TG_OP = 'DELETE' THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER carts_reserved_quantity
+        BEFORE UPDATE OF is_active OR DELETE ON carts
+        FOR EACH ROW EXECUTE FUNCTION carts_reserved_quantity()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS carts_reserved_quantity ON carts")
+    op.execute("DROP FUNCTION IF EXISTS carts_reserved_quantity()")
+    op.execute("DROP TRIGGER IF EXISTS cart_items_reserved_quantity ON cart_items")
+    op.execute("DROP FUNCTION IF EXISTS cart_items_reserved_quantity()")
+    op.drop_column('products', 'reserved_quantity')
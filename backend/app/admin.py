@@ -20,6 +20,7 @@ from app.models import (
     Referral,
     User,
 )
+from app.services.category.cache import invalidate_category_names
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -167,6 +168,14 @@ class CategoryAdmin(ModelView, model=Category):
     column_labels = {"name": "Название", "description": "Описание"}
     column_searchable_list = [Category.name]
 
+    async def after_model_change(
+        self, data: dict, model: Any, is_created: bool, request: Request
+    ) -> None:
+        await invalidate_category_names()
+
+    async def after_model_delete(self, model: Any, request: Request) -> None:
+        await invalidate_category_names()
+
 
 class OrderAdmin(ModelView, model=Order):
     name, name_plural, icon = "Заказ", "Заказы", "fa-solid fa-shopping-cart"
@@ -44,6 +44,7 @@ from app.schemas.admin import (
 from app.schemas.export import SExportOrdersRequest
 from app.schemas.product import SProduct, SProductCreate, SProductUpdate
 from app.schemas.referral import SReferralPayoutRequest, SReferralPayoutRequestPaginated
+from app.services.category.cache import invalidate_category_names
 from app.services.export.export_service import ExportService
 from app.services.referral.referral_service import ReferralService
 from app.services.telegram.export_service import TelegramExportService
@@ -140,6 +141,10 @@ async def update_product(
             status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
         )
 
+    # Категория создается при первом упоминании, кэш ее имен нужно сбросить
+    if product_data.category:
+        await invalidate_category_names()
+
     # Преобразуем продукт в словарь, совместимый со схемой SProduct
     return SProduct(**product_crud.to_dict(updated_product))
 
@@ -183,6 +188,8 @@ async def create_product(
         # Создаем товар через CRUD
         product_crud = ProductCRUD(session)
         product = await product_crud.create_product(product_data)
+        if product_data.category:
+            await invalidate_category_names()
 
         # Правильно преобразуем продукт в словарь для ответа
         response_data = {
@@ -10,3 +10,26 @@ redis_args = dict(
     decode_responses=True,
 )
 async_redis = aioredis.Redis(**redis_args)
+# Клиент без декодирования ответов для хранения сериализованных данных в байтах
+async_redis_raw = aioredis.Redis(**(redis_args | {"decode_responses": False}))
+
+# Блокировка снимается, только если ее все еще держит тот же владелец
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# register_script загружает скрипт при первом вызове и дальше использует EVALSHA
+release_lock_script = async_redis.register_script(RELEASE_LOCK_LUA)
+
+
+async def release_lock(
+    key: str, token: str, client: aioredis.Redis = async_redis
+) -> bool:
+    """
+    Снятие блокировки, взятой через SET key token NX EX.
+    Если блокировка истекла и ее взял другой владелец, она не удаляется
+    """
+    return bool(await release_lock_script(keys=[key], args=[token], client=client))
@@ -275,15 +275,15 @@ class AdminCRUD:
         Returns:
             list[str]: Список названий категорий
         """
-        query = select(Category)
+        # Имя категории обязательно, поэтому выбираем только его и сортируем в БД
+        query = select(Category.name).order_by(Category.name)
         result = await self.session.execute(query)
-        categories = result.scalars().all()
+        category_names = result.scalars().all()
 
-        # Возвращаем только названия для сохранения совместимости
-        category_names = [cat.name for cat in categories if cat.name]
-
-        logger.debug(f"Retrieved {len(category_names)} product categories")
-        return sorted(category_names)
+        logger.debug(
+            "Retrieved product categories", extra={"count": len(category_names)}
+        )
+        return category_names
 
     async def update_user_roles(
         self, user_id: UUID, role_names: List[str]
@@ -1,11 +1,11 @@
 # backend/app/crud/cart.py
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import and_, func, select, update
+from sqlalchemy import and_, exists, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.core.logger import logger
 from app.core.settings import settings
@@ -28,13 +28,26 @@ class CartCRUD:
         Returns:
             bool: True если корзина была деактивирована
         """
-        cart = await self.get_cart_by_id(cart_id)
-        if not cart or cart.items:
-            return False
-
-        cart.is_active = False
+        # Проверка пустоты и деактивация одним запросом, без загрузки позиций
+        stmt = (
+            update(Cart)
+            .where(
+                and_(
+                    Cart.id == cart_id,
+                    Cart.is_active == True,
+                    ~exists().where(CartItem.cart_id == Cart.id),
+                )
+            )
+            .values(is_active=False)
+            .returning(Cart.id)
+        )
+        result = await self.session.execute(stmt)
+        deactivated = result.scalar_one_or_none() is not None
         await self.session.commit()
 
+        if not deactivated:
+            return False
+
         logger.info("Deactivated empty cart", extra={"cart_id": str(cart_id)})
 
         return True
@@ -51,7 +64,7 @@ class CartCRUD:
         """
         query = (
             select(Cart)
-            .options(joinedload(Cart.items).joinedload(CartItem.product))
+            .options(selectinload(Cart.items).joinedload(CartItem.product))
             .where(
                 and_(
                     Cart.user_id == user_id,
@@ -65,7 +78,7 @@ class CartCRUD:
             .limit(1)  # Добавляем лимит, чтобы получить только одну запись
         )
         result = await self.session.execute(query)
-        cart = result.unique().scalar_one_or_none()
+        cart = result.scalar_one_or_none()
 
         if cart:
             logger.debug(
@@ -219,26 +232,31 @@ class CartCRUD:
 
         return cart_item
 
-    async def remove_product(self, cart_id: UUID, product_id: UUID) -> bool:
+    async def remove_and_maybe_deactivate(
+        self, cart: Cart, product_id: UUID
+    ) -> Tuple[bool, bool]:
         """
-        Удаление товара из корзины
+        Удаление товара из корзины и деактивация опустевшей корзины
+        одной транзакцией
 
         Args:
-            cart_id: ID корзины
+            cart: Корзина с загруженными позициями
             product_id: ID товара
 
         Returns:
-            bool: True если товар был удален
+            Tuple[bool, bool]: (товар удален, корзина деактивирована)
         """
-        cart = await self.get_cart_by_id(cart_id)
-        if not cart:
-            return False
+        if not cart.remove_item(product_id):
+            return False, False
 
-        if cart.remove_item(product_id):
-            await self.session.commit()
-            return True
+        deactivated = not cart.items
+        if deactivated:
+            cart.is_active = False
+
+        # DELETE позиции и UPDATE корзины уходят одним flush при коммите
+        await self.session.commit()
 
-        return False
+        return True, deactivated
 
     async def clear_cart(self, cart_id: UUID) -> bool:
         """
@@ -310,18 +328,41 @@ class CartCRUD:
 
         return True
 
-    async def get_expired_carts(self) -> List[Cart]:
+    async def deactivate_expired_batch(self, limit: int = 1000) -> List[UUID]:
         """
-        Получение списка просроченных корзин
+        Деактивация очередной пачки просроченных корзин одним запросом.
+        Строки, заблокированные другим воркером, пропускаются.
+
+        Args:
+            limit: Максимальный размер пачки
 
         Returns:
-            List[Cart]: Список просроченных корзин
+            List[UUID]: ID деактивированных корзин
         """
-        query = select(Cart).where(
-            and_(Cart.is_active == True, Cart.expires_at <= datetime.now().astimezone())
+        expired_ids = (
+            select(Cart.id)
+            .where(
+                and_(
+                    Cart.is_active == True,
+                    Cart.expires_at <= datetime.now().astimezone(),
+                )
+            )
+            .order_by(Cart.expires_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
         )
-        result = await self.session.execute(query)
-        return result.scalars().all()
+        stmt = (
+            update(Cart)
+            .where(Cart.id.in_(expired_ids))
+            .values(is_active=False)
+            .returning(Cart.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        cart_ids = result.scalars().all()
+        await self.session.commit()
+
+        return cart_ids
 
     async def get_cart_by_id(self, cart_id: UUID) -> Optional[Cart]:
         """
@@ -335,42 +376,17 @@ class CartCRUD:
         """
         query = (
             select(Cart)
-            .options(joinedload(Cart.items).joinedload(CartItem.product))
+            .options(selectinload(Cart.items).joinedload(CartItem.product))
             .where(Cart.id == cart_id)
         )
         result = await self.session.execute(query)
-        cart = result.unique().scalar_one_or_none()
+        cart = result.scalar_one_or_none()
 
         if cart:
             logger.debug("Retrieved cart by id", extra={"cart_id": str(cart_id)})
 
         return cart
 
-    async def get_active_carts_with_product(self, product_id: UUID) -> List[Cart]:
-        """
-        Получение активных корзин, содержащих указанный товар
-
-        Args:
-            product_id: ID товара
-
-        Returns:
-            List[Cart]: Список активных корзин с товаром
-        """
-        query = (
-            select(Cart)
-            .options(joinedload(Cart.items))
-            .where(
-                and_(
-                    Cart.is_active == True,
-                    Cart.expires_at > datetime.now().astimezone(),
-                    Cart.items.any(CartItem.product_id == product_id),
-                )
-            )
-        )
-
-        result = await self.session.execute(query)
-        return result.unique().scalars().all()  # Добавили unique()
-
     async def cleanup_duplicate_carts(self) -> int:
         """
         Очищает дублирующиеся активные корзины, оставляя только самую свежую для каждого пользователя
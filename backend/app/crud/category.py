@@ -45,3 +45,13 @@ class CategoryCRUD:
         """
         result = await self.session.execute(select(Category))
         return result.scalars().all()
+
+    async def get_all_names(self) -> List[str]:
+        """
+        Получение имен всех категорий без загрузки ORM-объектов
+
+        Returns:
+            List[str]: Список имен категорий
+        """
+        result = await self.session.execute(select(Category.name))
+        return result.scalars().all()
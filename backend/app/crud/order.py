@@ -1,19 +1,22 @@
 # backend/app/crud/order.py
 from datetime import date, datetime, timezone
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
-from sqlalchemy import and_, desc, func, select
+from sqlalchemy import and_, desc, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.core.logger import logger
 from app.models import Order
 from app.models.cart import Cart
 from app.models.order import Order, OrderItem
 from app.models.order_status import OrderStatus
+from app.models.promo_code import PromoCode
+from app.models.user import UserDiscount
 from app.schemas.cdek.base import RequestLocation
+from app.schemas.user import UserDiscountLevel
 
 
 class OrderCRUD:
@@ -35,6 +38,7 @@ class OrderCRUD:
         delivery_point: str = None,
         delivery_to_location: RequestLocation = None,
         delivery_comment: Optional[str] = None,
+        applied_promo_code: Optional[PromoCode] = None,
     ) -> Order:
         """
         Создание заказа из корзины
@@ -49,6 +53,8 @@ class OrderCRUD:
             delivery_point: Код ПВЗ СДЕК
             delivery_to_location: Объект, описывающий локацию доставки (Курьер)
             delivery_comment: Комментарий к доставке (Курьер - указываем доп. инфу)
+            applied_promo_code: Примененный промокод, его использование
+                списывается в той же транзакции, если промокод еще действует
 
         Returns:
             Order: Созданный заказ
@@ -74,12 +80,25 @@ class OrderCRUD:
             delivery_tariff_code=delivery_tariff_code,
         )
 
+        # Промокод списываем атомарно: если его успели исчерпать или он истек
+        # после проверки, заказ создается без скидки по промокоду
+        if applied_promo_code and not await self._use_promo_code(applied_promo_code):
+            logger.warning(
+                "Promo code is no longer valid, order created without it",
+                extra={"promo_code": applied_promo_code.code},
+            )
+            applied_promo_code = None
+            promo_discount = Decimal("0")
+
         order.calculate_totals(discount_multiplier, promo_discount)
 
         # Добавляем метод оплаты
         order.payment_method = payment_method
         order.payment_status = "pending"
 
+        if applied_promo_code:
+            order.promo_code = applied_promo_code.code
+
         self.session.add(order)
 
         # Деактивируем корзину
@@ -100,6 +119,25 @@ class OrderCRUD:
 
         return order
 
+    async def _use_promo_code(self, promo_code: PromoCode) -> bool:
+        """
+        Списывает одно использование промокода, если он все еще действует.
+        Проверка и списание выполняются одним UPDATE, без коммита
+        """
+        q = (
+            update(PromoCode)
+            .where(
+                PromoCode.id == promo_code.id,
+                PromoCode.is_active.is_(True),
+                PromoCode.uses_left > 0,
+                or_(PromoCode.expires_at.is_(None), PromoCode.expires_at > func.now()),
+            )
+            .values(uses_left=PromoCode.uses_left - 1)
+            .returning(PromoCode.id)
+        )
+        res = await self.session.execute(q)
+        return res.scalar_one_or_none() is not None
+
     async def get_order(
         self, order_id: UUID, with_items: bool = True
     ) -> Optional[Order]:
@@ -264,6 +302,38 @@ class OrderCRUD:
 
         return orders, total
 
+    async def iter_orders_for_admin(
+        self, filters: Optional[Dict[str, Any]] = None, page_size: int = 500
+    ) -> AsyncIterator[Order]:
+        """
+        Постраничное чтение заказов через серверный курсор, например для экспорта.
+        В памяти одновременно находится не больше одной страницы заказов
+
+        Args:
+            filters: Словарь с фильтрами для запроса
+            page_size: Количество заказов, получаемых из БД за раз
+
+        Yields:
+            Order: Заказ с позициями, товарами и пользователем
+        """
+        # joinedload коллекций несовместим с yield_per, позиции догружаются
+        # отдельным запросом на каждую страницу
+        query = select(Order).options(
+            selectinload(Order.items).joinedload(OrderItem.product),
+            joinedload(Order.user),
+        )
+
+        if filters:
+            query = self._apply_admin_filters(query, filters)
+
+        query = query.order_by(desc(Order.created_at)).execution_options(
+            yield_per=page_size
+        )
+
+        result = await self.session.stream_scalars(query)
+        async for order in result:
+            yield order
+
     def _apply_admin_filters(self, query, filters: Dict[str, Any]):
         """
         Применение фильтров к запросу заказов для административного интерфейса
@@ -297,40 +367,31 @@ class OrderCRUD:
 
         return query
 
-    async def get_orders_for_shipping(self) -> Sequence[Order]:
+    async def ship_ready_orders(self) -> List[UUID]:
         """
-        Получение заказов, готовых к отправке
-        Возвращает оплаченные заказы, у которых планируемая дата отгрузки
-        меньше или равна текущему времени
+        Перевод в статус "отправлен" оплаченных заказов, у которых планируемая
+        дата отгрузки меньше или равна текущему времени, одним запросом
 
         Returns:
-            List[Order]: Список заказов, готовых к отправке
+            List[UUID]: ID отправленных заказов
         """
-        # Запрос на получение заказов для отгрузки с жадной загрузкой всех связанных данных
         query = (
-            select(Order)
+            update(Order)
             .where(
-                and_(
-                    Order.status == OrderStatus.PAID.value,
-                    Order.planned_shipping_date <= datetime.now().astimezone(),
-                )
-            )
-            .options(
-                joinedload(Order.items).joinedload(
-                    OrderItem.product
-                ),  # Жадно загружаем товары
-                joinedload(Order.user),  # Жадно загружаем данные пользователя
+                Order.status == OrderStatus.PAID.value,
+                Order.planned_shipping_date <= datetime.now().astimezone(),
             )
+            .values(status=OrderStatus.SHIPPED.value)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
         )
-
         result = await self.session.execute(query)
-        orders = result.unique().scalars().all()
+        order_ids = list(result.scalars().all())
+        await self.session.commit()
 
-        logger.debug(
-            "Retrieved orders for shipping", extra={"orders_count": len(orders)}
-        )
+        logger.debug("Shipped ready orders", extra={"orders_count": len(order_ids)})
 
-        return orders
+        return order_ids
 
     async def get_monthly_total(
         self,
@@ -353,6 +414,67 @@ class OrderCRUD:
         res = await self.session.execute(q)
         return res.scalar_one()
 
+    async def fetch_paid_context(
+        self,
+        order_id: UUID,
+        user_id: UUID,
+        month_start: datetime | date,
+    ) -> Tuple[
+        Optional[OrderStatus], Decimal, Optional[UserDiscountLevel], Optional[date]
+    ]:
+        """
+        Данные для пересчета скидки после оплаты одним запросом: статус заказа,
+        сумма оплаченных заказов с month_start, уровень скидки и дата последней
+        покупки (None, если записи о скидке еще нет)
+        """
+        order_status = select(Order.status).where(Order.id == order_id)
+        monthly_total = select(func.coalesce(func.sum(Order.total), 0)).where(
+            Order.user_id == user_id,
+            Order.status == OrderStatus.PAID,
+            Order.created_at >= month_start,
+        )
+        current_level = select(UserDiscount.current_level).where(
+            UserDiscount.user_id == user_id
+        )
+        last_purchase_date = select(UserDiscount.last_purchase_date).where(
+            UserDiscount.user_id == user_id
+        )
+
+        q = select(
+            order_status.scalar_subquery(),
+            monthly_total.scalar_subquery(),
+            current_level.scalar_subquery(),
+            last_purchase_date.scalar_subquery(),
+        )
+        res = await self.session.execute(q)
+        return res.one()
+
+    async def fetch_discount_context(
+        self,
+        user_id: UUID,
+        month_start: datetime | date = None,
+    ) -> Tuple[Decimal, Optional[UserDiscountLevel]]:
+        """
+        Сумма оплаченных заказов с month_start и уровень скидки пользователя
+        одним запросом (уровень None, если записи о скидке еще нет)
+        """
+        if month_start is None:
+            now = datetime.now(tz=timezone.utc)
+            month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+        monthly_total = select(func.coalesce(func.sum(Order.total), 0)).where(
+            Order.user_id == user_id,
+            Order.status == OrderStatus.PAID,
+            Order.created_at >= month_start,
+        )
+        current_level = select(UserDiscount.current_level).where(
+            UserDiscount.user_id == user_id
+        )
+
+        q = select(monthly_total.scalar_subquery(), current_level.scalar_subquery())
+        res = await self.session.execute(q)
+        return res.one()
+
     async def get_current_month_orders_count(self, user_id: UUID) -> int:
         """Считает количество оплаченных заказов пользователя за текущий календарный месяц."""
         now = datetime.now(timezone.utc)
@@ -387,3 +509,40 @@ class OrderCRUD:
         )
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none() is not None
+
+    async def users_with_orders_in_range(
+        self,
+        user_ids: Sequence[UUID],
+        start_date: datetime,
+        end_date: datetime,
+        status: Optional[OrderStatus] = OrderStatus.PAID,
+    ) -> set[UUID]:
+        """
+        Пользователи из списка, у которых есть заказы за период, одним запросом
+
+        Args:
+            user_ids: ID пользователей для проверки
+            start_date: Начало периода
+            end_date: Конец периода
+            status: Статус заказа
+
+        Returns:
+            set[UUID]: ID пользователей с заказами за период
+        """
+        if not user_ids:
+            return set()
+
+        stmt = (
+            select(Order.user_id)
+            .where(
+                and_(
+                    Order.user_id.in_(user_ids),
+                    Order.created_at >= start_date,
+                    Order.created_at <= end_date,
+                    Order.status == status,
+                )
+            )
+            .distinct()
+        )
+        result = await self.session.execute(stmt)
+        return set(result.scalars().all())
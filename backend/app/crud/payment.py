@@ -1,8 +1,9 @@
 # backend/app/crud/payment.py
+from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from sqlalchemy import and_, desc, select
+from sqlalchemy import and_, desc, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.logger import logger
@@ -148,6 +149,32 @@ class PaymentCRUD:
 
         return payment
 
+    async def cancel_order_payments(self, order_id: UUID) -> List[UUID]:
+        """
+        Отмена всех незавершенных платежей заказа одним запросом
+
+        Args:
+            order_id: ID заказа
+
+        Returns:
+            List[UUID]: ID отмененных платежей
+        """
+        # Как и Payment.update_status, отмена проставляет дату возврата
+        query = (
+            update(Payment)
+            .where(
+                Payment.order_id == order_id,
+                Payment.status.notin_(["succeeded", "refunded", "canceled"]),
+            )
+            .values(status="canceled", refunded_at=datetime.now().astimezone())
+            .returning(Payment.id)
+        )
+        result = await self.session.execute(query)
+        payment_ids = list(result.scalars().all())
+        await self.session.commit()
+
+        return payment_ids
+
     async def get_order_payments(self, order_id: UUID) -> List[Payment]:
         """
         Получение всех платежей для заказа
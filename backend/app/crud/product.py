@@ -70,6 +70,23 @@ class ProductCRUD:
             logger.debug(f"Product not found", extra={"product_id": str(product_id)})
         return product
 
+    async def get_product_for_update(self, product_id: UUID) -> Optional[Product]:
+        """
+        Получение товара по ID с блокировкой строки до конца транзакции.
+        Проверка остатка и изменение корзины под блокировкой не пересекаются
+        с такими же изменениями в других запросах
+        """
+        query = (
+            select(Product)
+            .where(Product.id == product_id)
+            .with_for_update()
+            # Товар мог быть загружен раньше вместе с корзиной, а reserved_quantity
+            # нужен актуальный
+            .execution_options(populate_existing=True)
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
     async def create_product(self, product_data: SProductCreate) -> Product:
         """
         Создание нового товара
@@ -1,5 +1,5 @@
 from datetime import date
-from typing import Sequence
+from typing import Iterable, Sequence, Tuple
 from uuid import UUID
 
 from sqlalchemy import select, update
@@ -62,7 +62,20 @@ class UserDiscountCRUD:
         q = (
             update(UserDiscount)
             .where(UserDiscount.user_id == user_id)
-            .values(discount_level=new_level)
+            .values(current_level=new_level)
         )
         await self.session.execute(q)
         await self.session.commit()
+
+    async def bulk_update_levels(
+        self,
+        levels: Iterable[Tuple[UUID, UserDiscountLevel]],
+    ) -> None:
+        # ORM bulk UPDATE по первичному ключу: один executemany на все записи
+        params = [
+            {"user_id": user_id, "current_level": level} for user_id, level in levels
+        ]
+        if not params:
+            return
+        await self.session.execute(update(UserDiscount), params)
+        await self.session.commit()
@@ -16,13 +16,16 @@ from starlette.responses import Response
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
 from app.admin import init_admin
+from app.api.deps import get_cdek_service
 from app.api.middleware import log_request_middleware
 from app.api.tags import Tags
 from app.api.v1.router import api_router
-from app.core.db import engine
+from app.core.db import async_session, engine
 from app.core.logger import logger
 from app.core.settings import settings
 from app.services.cdek.client import get_cdek_async_client
+from app.services.cdek.geocoder.nominatim import close_nominatim
+from app.services.cdek.geocoder.yandex import close_yandex
 from app.services.scheduler import scheduler
 
 
@@ -83,6 +86,17 @@ async def lifespan(app_instance: FastAPI) -> AsyncGenerator[None, None]:
     app_instance.state.cdek_client = get_cdek_async_client()
     logger.info("CDEK client initialized")
 
+    # Вебхуки СДЭК настраиваем один раз при запуске, а не при каждом заказе
+    try:
+        async with async_session() as session:
+            cdek_service = await get_cdek_service(session)
+            await cdek_service.setup_webhooks()
+        logger.info("CDEK webhooks configured")
+    except Exception as e:
+        logger.error(
+            "Failed to configure CDEK webhooks", extra={"error": str(e)}, exc_info=True
+        )
+
     logger.info(f"Application started in {settings.ENVIRONMENT} mode")
 
     # Запуск планировщика задач
@@ -95,6 +109,8 @@ async def lifespan(app_instance: FastAPI) -> AsyncGenerator[None, None]:
     logger.info("Shutting down application...")
 
     await app_instance.state.cdek_client.aclose()
+    await close_nominatim()
+    await close_yandex()
 
     logger.info("Application shutdown complete")
 
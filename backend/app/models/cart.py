@@ -4,7 +4,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -23,7 +23,7 @@ class CartItem(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     cart_id = Column(UUID(as_uuid=True), ForeignKey("carts.id", ondelete="CASCADE"))
     product_id = Column(
-        UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE")
+        UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), index=True
     )
     quantity = Column(Integer, nullable=False)
 
@@ -59,6 +59,11 @@ class Cart(Base):
     """
 
     __tablename__ = "carts"
+    __table_args__ = (
+        Index("ix_carts_is_active_expires_at", "is_active", "expires_at"),
+        # Частичный индекс для выборки просроченных корзин
+        Index("carts_expired_idx", "expires_at", postgresql_where=text("is_active")),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
@@ -27,6 +27,8 @@ class Product(Base):
     additional_description = Column(Text, nullable=True)
     price = Column(Numeric(10, 2), nullable=False)
     stock = Column(Integer, default=0, nullable=False)
+    # Количество в активных корзинах, поддерживается триггерами в БД
+    reserved_quantity = Column(Integer, default=0, server_default="0", nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
 
     image_url = Column(ResilientImageType(storage=storage), nullable=True)
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 from app.schemas.cdek.enums import (
     ContragentType,
@@ -215,3 +215,9 @@ class EntityRequest(BaseModel):
     state: RequestState
     errors: Optional[list[ErrorDto]] = None
     warnings: Optional[list[WarningDto]] = None
+
+
+REQUEST_LOCATION_ADAPTER = TypeAdapter(RequestLocation)
+CONTACT_ADAPTER = TypeAdapter(Contact)
+ERROR_ADAPTER = TypeAdapter(ErrorDto)
+ERROR_LIST_ADAPTER = TypeAdapter(list[ErrorDto])
@@ -11,6 +11,13 @@ class CDEKCacheKey(StrEnum):
     REGIONS = "regions"
     CITIES = "cities"
     DELIVERY_POINTS = "delivery_points"
+    TOKEN = "token"
+    TARIFF = "tariff"
+
+
+class DeliveryMethod(StrEnum):
+    PICKUP = auto()
+    COURIER = auto()
 
 
 class OfficeType(UpperStrEnum):
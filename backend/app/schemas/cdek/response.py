@@ -1,6 +1,6 @@
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 from app.schemas.cdek.base import (
     Entity,
@@ -24,6 +24,11 @@ class OAuthTokenResponse(BaseModel):
     scope: str
     jti: str
 
+    model_config = ConfigDict(
+        strict=True,
+        extra="ignore",
+    )
+
 
 class RegionResponse(BaseModel):
     region: str
@@ -72,16 +77,31 @@ class TariffListResponse(BaseModel):
     errors: list[ErrorDto] = []
     warnings: list[WarningDto] = []
 
+    model_config = ConfigDict(
+        strict=True,
+        extra="ignore",
+    )
+
 
 class OrderCreationResponse(BaseModel):
     entity: Entity
     requests: list[EntityRequest]
 
+    model_config = ConfigDict(
+        strict=True,
+        extra="ignore",
+    )
+
 
 class OrderInfoResponse(BaseModel):
     entity: OrderEntity
     requests: list[EntityRequest]
 
+    model_config = ConfigDict(
+        strict=True,
+        extra="ignore",
+    )
+
 
 class WebhookCreationResponse(BaseModel):
     entity: WebhookEntity
@@ -139,7 +159,7 @@ class SAddressSearchResult(BaseModel):
 class SDeliveryPointSearchResult(BaseModel):
     """Результат поиска ПВЗ"""
 
-    id: str
+    id: UUID
     title: str
     subtitle: str
     address: str
@@ -152,3 +172,7 @@ class SDeliveryPointSearchResult(BaseModel):
     model_config = ConfigDict(
         extra="ignore",
     )
+
+
+ADDRESS_ADAPTER = TypeAdapter(SAddress)
+DELIVERY_POINT_LIST_ADAPTER = TypeAdapter(list[SDeliveryPoint])
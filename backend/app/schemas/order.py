@@ -4,7 +4,7 @@ from decimal import Decimal
 from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 
 from app.models.order_status import OrderStatus
 from app.schemas.cdek.base import RequestLocation
@@ -142,3 +142,9 @@ class SUserAddress(BaseModel):
     floor: Optional[int] = None
     intercom_code: Optional[int] = None
     # is_default: bool
+
+
+USER_DELIVERY_POINT_ADAPTER = TypeAdapter(SUserDeliveryPoint)
+USER_DELIVERY_POINT_LIST_ADAPTER = TypeAdapter(list[SUserDeliveryPoint])
+USER_ADDRESS_ADAPTER = TypeAdapter(SUserAddress)
+USER_ADDRESS_LIST_ADAPTER = TypeAdapter(list[SUserAddress])
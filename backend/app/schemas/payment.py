@@ -4,7 +4,7 @@ from decimal import Decimal
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-from pydantic import UUID4, BaseModel, Field
+from pydantic import UUID4, BaseModel, ConfigDict, Field
 
 
 class PaymentProvider(str, Enum):
@@ -100,6 +100,11 @@ class SPaymentResponse(BaseModel):
     confirmation_url: Optional[str] = Field(None, description="URL для оплаты")
     status: str = Field(..., description="Статус платежа")
 
+    model_config = ConfigDict(
+        strict=True,
+        extra="ignore",
+    )
+
 
 class SWidgetPaymentResponse(SPaymentResponse):
     """Схема ответа для платежа с виджетом"""
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Any, Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 from app.enums.referral import ReferralPayoutStatus
 from app.models import Referral
@@ -82,3 +82,6 @@ class SReferralPayoutRequest(BaseModel):
 
 class SReferralPayoutRequestPaginated(SListPaginated):
     items: list[Optional[SReferralPayoutRequest]] = []
+
+
+PAYOUT_REQUEST_ADAPTER = TypeAdapter(SReferralPayoutRequest)
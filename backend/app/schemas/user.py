@@ -3,7 +3,7 @@ from enum import Enum, StrEnum, auto
 from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from typing_extensions import Annotated
 
 
@@ -135,3 +135,6 @@ class SUserDiscountProgress(BaseModel):
 
 class SUserMonthlyOrders(BaseModel):
     monthly_orders_amount: int
+
+
+USER_PROFILE_ADAPTER = TypeAdapter(SUserProfile)
@@ -1,15 +1,29 @@
 # backend/app/services/cart/cart_service.py
-from typing import Optional
-from uuid import UUID
+import logging
+from uuid import UUID, uuid4
 
 from fastapi import HTTPException, status
 
 from app.core.logger import logger
+from app.core.redis import async_redis, release_lock
 from app.crud.cart import CartCRUD
 from app.crud.product import ProductCRUD
 from app.models.cart import Cart
 from app.schemas.cart import SAddToCart, SUpdateCartItem
-from app.services.cart.reservation_service import ReservationService
+from app.utils.cache import RedisKeyBuilder
+
+CLEANUP_LOCK_TTL = 600  # 10 минут
+
+
+class CartRedisKeyBuilder(RedisKeyBuilder):
+    def __init__(self):
+        super().__init__(service="cart")
+
+    def cleanup_lock(self) -> str:
+        return self.build("cleanup_lock")
+
+
+redis_key_builder = CartRedisKeyBuilder()
 
 
 class CartService:
@@ -18,7 +32,6 @@ class CartService:
     def __init__(self, cart_crud: CartCRUD, product_crud: ProductCRUD):
         self.cart_crud = cart_crud
         self.product_crud = product_crud
-        self.reservation_service = ReservationService(product_crud)
 
     async def get_or_create_cart(self, user_id: UUID) -> Cart:
         """
@@ -60,8 +73,10 @@ class CartService:
         # Получаем или создаем корзину
         cart = await self.get_or_create_cart(user_id)
 
-        # Проверяем наличие товара
-        product = await self.product_crud.get_product(data.product_id)
+        # Запросы идут последовательно: CartCRUD и ProductCRUD делят одну
+        # AsyncSession, а она не допускает параллельных операций.
+        # Строка товара заблокирована до коммита добавления в корзину
+        product = await self.product_crud.get_product_for_update(data.product_id)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
@@ -73,17 +88,14 @@ class CartService:
                 detail="Product is not available",
             )
 
-        # Проверяем доступное количество с учетом резервов
-        available_quantity = await self.reservation_service.get_available_quantity(
-            product.id
-        )
-        if available_quantity < data.quantity:
+        # reserved_quantity уже включает количество из текущей корзины
+        if product.stock - product.reserved_quantity < data.quantity:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Not enough product quantity available",
             )
 
-        # Добавляем товар в корзину
+        # Добавляем товар в корзину, триггер резервирует его в reserved_quantity
         updated_cart = await self.cart_crud.add_product(
             cart.id, data.product_id, data.quantity
         )
@@ -94,11 +106,6 @@ class CartService:
                 detail="Failed to add product to cart",
             )
 
-        # Резервируем товар
-        await self.reservation_service.reserve_product(
-            data.product_id, data.quantity, cart.id
-        )
-
         return updated_cart
 
     async def update_quantity(
@@ -120,18 +127,23 @@ class CartService:
         """
         cart = await self.get_or_create_cart(user_id)
 
-        # Проверяем наличие товара
-        product = await self.product_crud.get_product(product_id)
+        # Строка товара заблокирована до коммита нового количества
+        product = await self.product_crud.get_product_for_update(product_id)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
             )
 
-        # Проверяем доступное количество
-        available_quantity = await self.reservation_service.get_available_quantity(
-            product_id, exclude_cart_id=cart.id
+        # Если количество установлено в 0, удаляем товар
+        if data.quantity == 0:
+            return await self.remove_from_cart(user_id, product_id)
+
+        current_quantity = next(
+            (item.quantity for item in cart.items if item.product_id == product_id),
+            0,
         )
-        if available_quantity < data.quantity:
+        # reserved_quantity уже включает количество из текущей корзины
+        if product.stock - product.reserved_quantity + current_quantity < data.quantity:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Not enough product quantity available",
@@ -148,31 +160,8 @@ class CartService:
                 detail="Product not found in cart",
             )
 
-        # Если количество установлено в 0, удаляем товар
-        if data.quantity == 0:
-            return await self.remove_from_cart(user_id, product_id)
-
-        # Обновляем резервацию
-        await self.reservation_service.update_reservation(
-            product_id, data.quantity, cart.id
-        )
-
         return cart
 
-    async def _check_and_deactivate_if_empty(self, cart: Cart) -> None:
-        """
-        Проверка корзины на пустоту и её деактивация при необходимости
-
-        Args:
-            cart: Корзина для проверки
-        """
-        if not cart.items:
-            await self.cart_crud.deactivate_if_empty(cart.id)
-            logger.debug(
-                "Cart deactivated because it became empty",
-                extra={"cart_id": str(cart.id)},
-            )
-
     async def remove_from_cart(self, user_id: UUID, product_id: UUID) -> Cart:
         """
         Удаление товара из корзины
@@ -189,17 +178,22 @@ class CartService:
         """
         cart = await self.get_or_create_cart(user_id)
 
-        # Удаляем товар и его резервацию
-        if await self.cart_crud.remove_product(cart.id, product_id):
-            await self.reservation_service.remove_reservation(product_id, cart.id)
-            # Проверяем не стала ли корзина пустой
-            await self._check_and_deactivate_if_empty(cart)
-        else:
+        # Удаляем товар и деактивируем корзину, если она стала пустой
+        removed, deactivated = await self.cart_crud.remove_and_maybe_deactivate(
+            cart, product_id
+        )
+        if not removed:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Product not found in cart",
             )
 
+        if deactivated and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Cart deactivated because it became empty",
+                extra={"cart_id": str(cart.id)},
+            )
+
         return cart
 
     async def clear_cart(self, user_id: UUID) -> None:
@@ -214,9 +208,8 @@ class CartService:
         """
         cart = await self.get_or_create_cart(user_id)
 
-        # Очищаем корзину и все резервации
+        # Очищаем корзину, резервы снимаются триггером вместе с позициями
         if await self.cart_crud.clear_cart(cart.id):
-            await self.reservation_service.remove_all_reservations(cart.id)
             # Деактивируем пустую корзину
             await self.cart_crud.deactivate_if_empty(cart.id)
         else:
@@ -246,31 +239,40 @@ class CartService:
 
         return cart
 
-    async def cleanup_expired_carts(self) -> None:
+    async def cleanup_expired_carts(self, batch_size: int = 1000) -> None:
         """
-        Очистка просроченных корзин
+        Очистка просроченных корзин пачками
         Должна вызываться периодически через задачу планировщика
-        """
-        expired_carts = await self.cart_crud.get_expired_carts()
-
-        for cart in expired_carts:
-            # Удаляем все резервации для корзины
-            await self.reservation_service.remove_all_reservations(cart.id)
 
-            # Деактивируем корзину
-            await self.cart_crud.deactivate_cart(cart.id)
-
-            logger.info("Cleaned up expired cart", extra={"cart_id": str(cart.id)})
-
-    async def get_available_quantity(
-        self, product_id: UUID, exclude_cart_id: Optional[UUID] = None
-    ) -> int:
+        Args:
+            batch_size: Количество корзин, деактивируемых за один запрос
+        """
+        # Одновременно очистку выполняет только один воркер
+        lock_key = redis_key_builder.cleanup_lock()
+        lock_token = uuid4().hex
+        if not await async_redis.set(
+            lock_key, lock_token, nx=True, ex=CLEANUP_LOCK_TTL
+        ):
+            logger.info("Expired carts cleanup is already running")
+            return
+
+        try:
+            total = 0
+            while cart_ids := await self.cart_crud.deactivate_expired_batch(batch_size):
+                total += len(cart_ids)
+
+            logger.info("Cleaned up expired carts", extra={"carts_count": total})
+        finally:
+            # Если очистка дольше CLEANUP_LOCK_TTL, блокировку мог взять
+            # следующий воркер, и удалять ее нельзя
+            await release_lock(lock_key, lock_token)
+
+    async def get_available_quantity(self, product_id: UUID) -> int:
         """
         Получение доступного количества товара с учетом резерваций в активных корзинах
 
         Args:
             product_id: ID товара
-            exclude_cart_id: ID корзины, которую нужно исключить из подсчета
 
         Returns:
             int: Доступное количество
@@ -285,29 +287,18 @@ class CartService:
                 status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
             )
 
-        # Получаем все активные корзины где есть этот товар
-        active_carts = await self.cart_crud.get_active_carts_with_product(product_id)
-
-        # Считаем общее количество зарезервированных единиц товара
-        reserved_quantity = sum(
-            cart_item.quantity
-            for cart in active_carts
-            for cart_item in cart.items
-            if cart_item.product_id == product_id
-            and cart.id != exclude_cart_id  # Исключаем указанную корзину
-            and not cart.is_expired()  # Проверяем что корзина не просрочена
-        )
-
-        available = max(0, product.stock - reserved_quantity)
+        # Резервы поддерживаются в самой строке товара, отдельный подсчет не нужен
+        available = max(0, product.stock - product.reserved_quantity)
 
-        logger.debug(
-            "Calculated available quantity",
-            extra={
-                "product_id": str(product_id),
-                "total_stock": product.stock,
-                "reserved": reserved_quantity,
-                "available": available,
-            },
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Calculated available quantity",
+                extra={
+                    "product_id": str(product_id),
+                    "total_stock": product.stock,
+                    "reserved": product.reserved_quantity,
+                    "available": available,
+                },
+            )
 
         return available
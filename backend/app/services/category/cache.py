@@ -0,0 +1,20 @@
+from app.core.redis import async_redis
+from app.utils.cache import RedisKeyBuilder
+
+TTL_CATEGORY_NAMES = 3600  # 1 час
+
+
+class CategoryRedisKeyBuilder(RedisKeyBuilder):
+    def __init__(self):
+        super().__init__(service="category")
+
+    def names(self) -> str:
+        return self.build("names")
+
+
+redis_key_builder = CategoryRedisKeyBuilder()
+
+
+async def invalidate_category_names() -> None:
+    """Сброс кэша имен категорий после создания, изменения или удаления категории"""
+    await async_redis.delete(redis_key_builder.names())
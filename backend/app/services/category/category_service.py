@@ -1,8 +1,11 @@
 # backend/app/services/category/category_service.py
+import json
 from typing import List
 
 from app.core.logger import logger
+from app.core.redis import async_redis
 from app.crud.category import CategoryCRUD
+from app.services.category.cache import TTL_CATEGORY_NAMES, redis_key_builder
 
 
 class CategoryService:
@@ -19,16 +22,15 @@ class CategoryService:
             List[str]: Список имен категорий
         """
         try:
-            logger.debug("Fetching all categories from database")
-            categories = await self.category_crud.get_all()
-
-            # Дополнительное логирование типов данных
-            logger.debug(f"Raw categories type: {type(categories)}")
-            logger.debug(f"Raw categories content: {categories}")
-
-            category_names = [
-                category.name for category in categories if hasattr(category, "name")
-            ]
+            cache_key = redis_key_builder.names()
+            cached = await async_redis.get(cache_key)
+            if cached:
+                return json.loads(cached)
+
+            category_names = await self.category_crud.get_all_names()
+            await async_redis.set(
+                cache_key, json.dumps(category_names), ex=TTL_CATEGORY_NAMES
+            )
 
             logger.info(
                 "Retrieved all categories",
@@ -1,7 +1,5 @@
 import asyncio
-import json
-import os
-import time
+import functools
 from typing import Any, Optional, Type
 from uuid import UUID
 
@@ -10,7 +8,11 @@ from pydantic import BaseModel, TypeAdapter
 
 from app.core.logger import logger
 from app.core.redis import async_redis
-from app.schemas.cdek.base import ErrorDto, WebhookEntity
+from app.schemas.cdek.base import (
+    ERROR_ADAPTER,
+    ERROR_LIST_ADAPTER,
+    WebhookEntity,
+)
 from app.schemas.cdek.request import (
     CitiesParams,
     DeliveryPointsParams,
@@ -33,6 +35,8 @@ from app.schemas.cdek.response import (
     WebhookDeletionResponse,
 )
 from app.services.cdek.cache import (
+    LOCAL_TTL_CITIES,
+    LOCAL_TTL_REGIONS,
     TTL_PICKUP_POINTS,
     TTL_REGIONS_AND_CITIES,
     CDEKRedisKeyBuilder,
@@ -42,49 +46,48 @@ from app.services.cdek.cache import (
 from app.services.cdek.client import CDEKAsyncClient
 
 
+@functools.cache
+def _get_type_adapter(model: Any) -> TypeAdapter:
+    """TypeAdapter компилирует валидаторы при создании, поэтому создаём его один раз"""
+    return TypeAdapter(model)
+
+
 class CDEKApi:
     def __init__(
         self,
         client_id: str,
         client_secret: str,
         client: CDEKAsyncClient,
-        credentials_file: str = "credentials.json",
     ):
         self.client_id = client_id
         self.client_secret = client_secret
-        self.credentials_file = credentials_file
         self.client: CDEKAsyncClient = client
-        # При инициализации пытаемся загрузить сохранённый токен, только если токен отсутствует или устарел
-        current_time = time.monotonic()
-        if not self.client.access_token or current_time >= self.client.token_expires_at:
-            self.load_credentials()
 
-    def load_credentials(self) -> None:
-        if os.path.exists(self.credentials_file):
-            try:
-                with open(self.credentials_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    token = data.get("access_token", "")
-                    expires_at = data.get("token_expires_at", 0.0)
-                    current_time = time.monotonic()
-                    if token and current_time < expires_at:
-                        self.client.token = token
-                        self.client.token_expires_at = expires_at
-                        logger.info("Token loaded from file.")
-                    else:
-                        logger.info("Token in file is missing or expired.")
-            except Exception as e:
-                logger.error(f"Error loading credentials: {e}")
+    async def load_credentials(self) -> None:
+        """Load the token shared by all workers from Redis."""
+        try:
+            token_key = redis_key_builder.token()
+            async with async_redis.pipeline(transaction=False) as pipe:
+                pipe.get(token_key)
+                pipe.ttl(token_key)
+                token, ttl = await pipe.execute()
+            if token and ttl > 0:
+                loop = asyncio.get_running_loop()
+                self.client.access_token = token
+                self.client.token_expires_at = loop.time() + ttl
+                logger.info("Token loaded from Redis.")
+            else:
+                logger.info("Token in Redis is missing or expired.")
+        except Exception as e:
+            logger.error(f"Error loading credentials: {e}")
 
-    def save_credentials(self) -> None:
-        data = {
-            "access_token": self.client.access_token,
-            "token_expires_at": self.client.token_expires_at,
-        }
+    async def save_credentials(self, expires_in: int) -> None:
+        """Store the token in Redis so other workers can reuse it."""
         try:
-            with open(self.credentials_file, "w", encoding="utf-8") as f:
-                json.dump(data, f)
-                logger.info("Token saved to file.")
+            await async_redis.set(
+                redis_key_builder.token(), self.client.access_token, ex=expires_in
+            )
+            logger.info("Token saved to Redis.")
         except Exception as e:
             logger.error(f"Error saving credentials: {e}")
 
@@ -105,23 +108,34 @@ class CDEKApi:
             loop = asyncio.get_running_loop()
             self.client.token_expires_at = loop.time() + token_data.expires_in
 
-            self.save_credentials()
+            await self.save_credentials(token_data.expires_in)
             logger.info("New token obtained successfully.")
         except Exception as e:
             logger.error(f"Error obtaining token: {e}")
             raise
 
+    def _has_valid_token(self) -> bool:
+        current_time = asyncio.get_running_loop().time()
+        return (
+            bool(self.client.access_token)
+            and current_time < self.client.token_expires_at
+        )
+
     async def ensure_token(self) -> None:
         """Ensure that a valid token is available in the global client.
-        Load from file only if token is missing or expired."""
-        current_time = asyncio.get_event_loop().time()
-        if not self.client.access_token or current_time >= self.client.token_expires_at:
-            # Attempt to load from file first
-            self.load_credentials()
-            if (
-                not self.client.access_token
-                or current_time >= self.client.token_expires_at
-            ):
+        Load from Redis only if token is missing or expired.
+        Only one coroutine refreshes the token, the rest wait for it."""
+        if self._has_valid_token():
+            return
+
+        async with self.client.token_lock:
+            # Another coroutine may have refreshed the token while we waited
+            if self._has_valid_token():
+                return
+
+            # Attempt to load from Redis first
+            await self.load_credentials()
+            if not self._has_valid_token():
                 await self.get_token()
 
     async def request(
@@ -139,25 +153,32 @@ class CDEKApi:
         kwargs["headers"] = headers
 
         if request_model is not None:
-            kwargs["json"] = request_model.model_dump(exclude_none=True)
+            # Сериализуем тело в pydantic сразу в байты, минуя dict и stdlib json
+            headers["Content-Type"] = "application/json"
+            kwargs["content"] = request_model.model_dump_json(exclude_none=True)
 
+        # Регулятор общий для всех запросов процесса и снижает нагрузку на CDEK
+        # при 429/5xx, не дожидаясь лавины повторов
+        await self.client.limiter.acquire()
+        response = None
         try:
             response = await self.client.request(method, endpoint, **kwargs)
         except Exception as e:
             logger.error(f"HTTP request failed: {e}")
             raise
-
-        response_json = response.json()
+        finally:
+            await self.client.limiter.release(response)
 
         if response.status_code >= 400:
             try:
-                type_adapter = TypeAdapter(ErrorDto)
+                response_json = response.json()
+                type_adapter = ERROR_ADAPTER
                 if isinstance(response_json, dict) and "errors" in response_json:
-                    type_adapter = TypeAdapter(list[ErrorDto])
+                    type_adapter = ERROR_LIST_ADAPTER
                     error_content = response_json["errors"]
                 else:
                     error_content = response_json
-                errors = type_adapter.validate_json(json.dumps(error_content))
+                errors = type_adapter.validate_python(error_content)
                 logger.error(f"API Error(s): {errors}")
             except Exception as e:
                 logger.error(f"Error processing error response: {e}")
@@ -165,17 +186,17 @@ class CDEKApi:
             return
 
         if response_model is not None:
-            return self._parse_response(response_json, response_model)
-        return response_json
+            return self._parse_response(response.content, response_model)
+        return response.json()
 
     @staticmethod
     def _parse_response(
-        response_json: Any, response_model: Type[BaseModel] | Type[list[BaseModel]]
+        content: bytes, response_model: Type[BaseModel] | Type[list[BaseModel]]
     ) -> Any:
         try:
-            json_str = json.dumps(response_json)
-            type_adapter = TypeAdapter(response_model)
-            return type_adapter.validate_json(json_str)
+            # Валидируем сырые байты ответа, минуя промежуточный dict
+            type_adapter = _get_type_adapter(response_model)
+            return type_adapter.validate_json(content)
         except Exception as e:
             logger.error(f"Error parsing response into model {response_model}: {e}")
             raise
@@ -207,7 +228,8 @@ class CDEKApi:
             data.model_dump(), use_hash=True
         ),
         ttl=TTL_REGIONS_AND_CITIES,
-        type_adapter=TypeAdapter(list[RegionResponse]),
+        type_adapter=_get_type_adapter(list[RegionResponse]),
+        local_ttl=LOCAL_TTL_REGIONS,
     )
     async def get_regions(self, data: RegionsParams) -> list[RegionResponse]:
         return await self.request(
@@ -222,7 +244,8 @@ class CDEKApi:
             data.model_dump(), use_hash=True
         ),
         ttl=TTL_REGIONS_AND_CITIES,
-        type_adapter=TypeAdapter(list[CityResponse]),
+        type_adapter=_get_type_adapter(list[CityResponse]),
+        local_ttl=LOCAL_TTL_CITIES,
     )
     async def get_cities(self, data: CitiesParams) -> list[CityResponse]:
         return await self.request(
@@ -245,7 +268,7 @@ class CDEKApi:
             data.model_dump(), use_hash=True
         ),
         ttl=TTL_PICKUP_POINTS,
-        type_adapter=TypeAdapter(list[DeliveryPointResponse]),
+        type_adapter=_get_type_adapter(list[DeliveryPointResponse]),
     )
     async def get_delivery_points(
         self, data: DeliveryPointsParams
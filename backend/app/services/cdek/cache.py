@@ -1,10 +1,14 @@
+import asyncio
 import functools
-from typing import Any, Awaitable, Callable, TypeVar
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+from uuid import uuid4
 
 from pydantic import TypeAdapter
 
 from app.core.logger import logger
-from app.core.redis import async_redis
+from app.core.redis import async_redis_raw, release_lock
 from app.schemas.cdek.enums import CDEKCacheKey
 from app.utils.cache import RedisKeyBuilder
 
@@ -13,6 +17,22 @@ T = TypeVar("T")
 
 TTL_REGIONS_AND_CITIES = 86400  # 24 часа
 TTL_PICKUP_POINTS = 10800  # 3 часа
+TTL_TARIFF = 60  # 1 минута, тариф пересчитывается при каждом изменении корзины
+
+# Время жизни копии в памяти процесса, позволяет не обращаться к Redis на каждый запрос
+LOCAL_TTL_REGIONS = 86400  # 24 часа
+LOCAL_TTL_CITIES = 3600  # 1 час
+LOCAL_CACHE_MAXSIZE = 32
+
+# После истечения ttl данные ещё столько живут в Redis и отдаются как устаревшие,
+# пока один воркер обновляет кэш
+STALE_TTL = 3600  # 1 час
+REFRESH_LOCK_TTL = 30
+REFRESH_WAIT_ATTEMPTS = 20
+REFRESH_WAIT_INTERVAL = 0.25
+
+# Версия формата данных в кэше, меняется вместе со способом сериализации
+CACHE_VERSION = "v1"
 
 
 class CDEKRedisKeyBuilder(RedisKeyBuilder):
@@ -20,19 +40,57 @@ class CDEKRedisKeyBuilder(RedisKeyBuilder):
         super().__init__(service="cdek")
 
     def regions(self, params: dict = None, *, use_hash: bool = False) -> str:
-        return self.build(CDEKCacheKey.REGIONS, params, use_hash=use_hash)
+        return self.build(
+            f"{CACHE_VERSION}:{CDEKCacheKey.REGIONS}", params, use_hash=use_hash
+        )
 
     def cities(self, params: dict = None, *, use_hash: bool = False) -> str:
-        return self.build(CDEKCacheKey.CITIES, params, use_hash=use_hash)
+        return self.build(
+            f"{CACHE_VERSION}:{CDEKCacheKey.CITIES}", params, use_hash=use_hash
+        )
 
     def delivery_points(self, params: dict = None, *, use_hash: bool = False) -> str:
-        return self.build(CDEKCacheKey.DELIVERY_POINTS, params, use_hash=use_hash)
+        return self.build(
+            f"{CACHE_VERSION}:{CDEKCacheKey.DELIVERY_POINTS}", params, use_hash=use_hash
+        )
+
+    def tariff(self, params: dict) -> str:
+        return self.build(CDEKCacheKey.TARIFF, params, use_hash=True)
+
+    def token(self) -> str:
+        return self.build(CDEKCacheKey.TOKEN)
+
+
+class LocalTTLCache:
+    """Небольшой кэш в памяти процесса с ограничением по времени жизни и размеру"""
+
+    def __init__(self, ttl: int, maxsize: int = LOCAL_CACHE_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: dict[str, tuple[float, Any]] = {}
+
+    def get(self, key: str) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        if key not in self._data and len(self._data) >= self.maxsize:
+            # Вытесняем самую раннюю запись
+            del self._data[next(iter(self._data))]
+        self._data[key] = (time.monotonic() + self.ttl, value)
 
 
 def cache_endpoint(
     cache_key_builder: Callable[..., str],
     ttl: int,
     type_adapter: TypeAdapter[T],
+    local_ttl: Optional[int] = None,
 ) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
     """
     Декоратор для кэширования результатов асинхронных эндпоинтов.
@@ -40,18 +98,77 @@ def cache_endpoint(
     :param cache_key_builder: функция, принимающая аргументы эндпоинта и возвращающая ключ для Redis.
     :param ttl: время жизни кэша в секундах.
     :param type_adapter: TypeAdapter для сериализации/десериализации результата.
+    :param local_ttl: если задан, результат дополнительно хранится в памяти процесса.
+
+    Обновление кэша выполняет только тот, кто захватил блокировку ключа.
+    Остальные получают устаревшие данные или дожидаются обновления.
     """
 
     def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        local_cache = LocalTTLCache(local_ttl) if local_ttl else None
+
+        async def refresh(cache_key: str, *args, **kwargs) -> T:
+            result = await func(*args, **kwargs)
+            # Списки городов и ПВЗ занимают мегабайты, поэтому храним их сжатыми
+            payload = zlib.compress(type_adapter.dump_json(result))
+            await async_redis_raw.set(cache_key, payload, ex=ttl + STALE_TTL)
+            return result
+
+        async def get_cached(cache_key: str, *args, **kwargs) -> T:
+            lock_key = f"{cache_key}:lock"
+
+            async with async_redis_raw.pipeline(transaction=False) as pipe:
+                pipe.get(cache_key)
+                pipe.ttl(cache_key)
+                cached, remaining = await pipe.execute()
+
+            if cached and remaining > STALE_TTL:
+                logger.info(f"Returning data from cache: {cache_key}")
+                return type_adapter.validate_json(zlib.decompress(cached))
+
+            lock_token = uuid4().hex
+            if await async_redis_raw.set(
+                lock_key, lock_token, nx=True, ex=REFRESH_LOCK_TTL
+            ):
+                try:
+                    return await refresh(cache_key, *args, **kwargs)
+                except Exception as e:
+                    # Пока CDEK недоступен, отдаем устаревшие данные, если они есть
+                    if not cached:
+                        raise
+                    logger.warning(
+                        "Failed to refresh cache, returning stale data",
+                        extra={"cache_key": cache_key, "error": str(e)},
+                    )
+                    return type_adapter.validate_json(zlib.decompress(cached))
+                finally:
+                    # Если обновление дольше REFRESH_LOCK_TTL, блокировку мог
+                    # взять другой воркер, и удалять ее нельзя
+                    await release_lock(lock_key, lock_token, client=async_redis_raw)
+
+            # Кэш обновляет другой запрос
+            if cached:
+                logger.info(f"Returning stale data from cache: {cache_key}")
+                return type_adapter.validate_json(zlib.decompress(cached))
+
+            for _ in range(REFRESH_WAIT_ATTEMPTS):
+                await asyncio.sleep(REFRESH_WAIT_INTERVAL)
+                cached = await async_redis_raw.get(cache_key)
+                if cached:
+                    return type_adapter.validate_json(zlib.decompress(cached))
+
+            return await refresh(cache_key, *args, **kwargs)
+
         @functools.wraps(func)
         async def wrapper(*args, **kwargs) -> T:
             cache_key = cache_key_builder(*args, **kwargs)
-            cached = await async_redis.get(cache_key)
-            if cached:
-                logger.info(f"Returning data from cache: {cache_key}")
-                return type_adapter.validate_json(cached)
-            result = await func(*args, **kwargs)
-            await async_redis.set(cache_key, type_adapter.dump_json(result), ex=ttl)
+            if local_cache is None:
+                return await get_cached(cache_key, *args, **kwargs)
+
+            result = local_cache.get(cache_key)
+            if result is None:
+                result = await get_cached(cache_key, *args, **kwargs)
+                local_cache.set(cache_key, result)
             return result
 
         return wrapper
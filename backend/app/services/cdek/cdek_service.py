@@ -1,25 +1,37 @@
-from http.client import HTTPException
-from types import SimpleNamespace
+import asyncio
+import logging
+from operator import attrgetter
 from uuid import UUID
 
-from fastapi import status
+from fastapi import HTTPException, status
 from geopy.point import Point
-from pydantic import TypeAdapter
 
 from app.core.logger import logger
+from app.core.redis import async_redis
 from app.core.settings import settings
 from app.crud.user_address import UserAddressCRUD
 from app.crud.user_delivery_point import UserDeliveryPointCRUD
 from app.models import CartItem, Order, User, UserAddress
 from app.schemas.cdek.base import (
+    CONTACT_ADAPTER,
+    REQUEST_LOCATION_ADAPTER,
     CalculatorLocation,
     CalculatorPackage,
     Contact,
+    Item,
+    Money,
+    Package,
     Phone,
     RequestLocation,
     TariffCode,
 )
-from app.schemas.cdek.enums import DeliveryMode, RequestState, RequestType, WebhookType
+from app.schemas.cdek.enums import (
+    DeliveryMethod,
+    DeliveryMode,
+    RequestState,
+    RequestType,
+    WebhookType,
+)
 from app.schemas.cdek.request import (
     AddressSearchParams,
     CenterPoint,
@@ -32,6 +44,8 @@ from app.schemas.cdek.request import (
     WebhookCreateForm,
 )
 from app.schemas.cdek.response import (
+    ADDRESS_ADAPTER,
+    DELIVERY_POINT_LIST_ADAPTER,
     RegionResponse,
     SAddress,
     SAddressSearchResult,
@@ -39,11 +53,37 @@ from app.schemas.cdek.response import (
     SDeliveryPointSearchResult,
 )
 from app.services.cdek.api import CDEKApi
+from app.services.cdek.cache import TTL_TARIFF, redis_key_builder
 from app.services.cdek.geocoder.nominatim import NominatimGeocoderService
 from app.services.cdek.geocoder.schemas import ParsedLocation
 from app.services.cdek.geocoder.utils import find_region_by_name
 from app.services.cdek.geocoder.yandex import YandexGeocoderService
 
+DEFAULT_COUNTRY_CODE = "RU"
+
+_WEBHOOK_SUFFIXES: dict[WebhookType, str] = {
+    WebhookType.ORDER_STATUS: "order_status",
+    WebhookType.ORDER_MODIFIED: "order_modified",
+    WebhookType.OFFICE_AVAILABILITY: "office_availability",
+    WebhookType.DELIV_PROBLEM: "deliv_problem",
+    WebhookType.DELIV_AGREEMENT: "deliv_agreement",
+}
+# Формы вебхуков не зависят от запроса, собираем их один раз при импорте
+_WEBHOOK_FORMS: dict[WebhookType, WebhookCreateForm] = {
+    _type: WebhookCreateForm.model_construct(
+        type=_type, url=f"{settings.CDEK_WEBHOOK_URL}/{suffix}"
+    )
+    for _type, suffix in _WEBHOOK_SUFFIXES.items()
+}
+
+# Поля адреса, попадающие в комментарий к заказу СДЭК
+_COMMENT_FIELDS = (
+    ("квартира", "apartment"),
+    ("подъезд", "entrance"),
+    ("этаж", "floor"),
+    ("код домофона", "intercom_code"),
+)
+
 
 class CDEKService:
     def __init__(
@@ -60,40 +100,30 @@ class CDEKService:
         self.user_address_crud = user_address_crud
         self.user_delivery_point_crud = user_delivery_point_crud
 
-    async def _setup_webhooks(self):
-        webhooks_mappingg = {
-            WebhookType.ORDER_STATUS: "order_status",
-            WebhookType.ORDER_MODIFIED: "order_modified",
-            WebhookType.OFFICE_AVAILABILITY: "office_availability",
-            WebhookType.DELIV_PROBLEM: "deliv_problem",
-            WebhookType.DELIV_AGREEMENT: "deliv_agreement",
-        }
-        base_url = settings.CDEK_WEBHOOK_URL
+    async def setup_webhooks(self):
+        """Приводит вебхуки СДЭК к ожидаемым, вызывается при запуске приложения"""
+        missing = dict(_WEBHOOK_FORMS)
 
+        outdated = []
         for webhook in await self.cdek_api.get_webhooks():
-            url = "/".join([base_url, webhooks_mappingg.get(webhook.type)])
-            if webhook.type in webhooks_mappingg.keys() and webhook.url != url:
-                await self.cdek_api.delete_webhook(webhook.uuid)
-                await self.cdek_api.add_webhook(
-                    WebhookCreateForm(type=webhook.type, url=url),
-                )
-                del webhooks_mappingg[webhook.type]
-
-        forms = [
-            WebhookCreateForm(
-                type=_type,
-                url="/".join([base_url, webhooks_mappingg[_type]]),
-            )
-            for _type in webhooks_mappingg
-        ]
+            if webhook.type not in missing:
+                continue
+            if webhook.url == missing[webhook.type].url:
+                # Вебхук уже настроен, повторно не создаём
+                del missing[webhook.type]
+            else:
+                outdated.append(webhook.uuid)
 
-        for form in forms:
-            await self.cdek_api.add_webhook(form)
+        # Запросы к CDEK независимы, выполняем их параллельно
+        await asyncio.gather(*(self.cdek_api.delete_webhook(uuid) for uuid in outdated))
+        await asyncio.gather(
+            *(self.cdek_api.add_webhook(form) for form in missing.values())
+        )
 
     async def _get_delivery_points_by_city(
         self, location: ParsedLocation, regions: list[RegionResponse]
     ):
-        city_to_get = CitiesParams(
+        city_to_get = CitiesParams.model_construct(
             country_codes=[location.country_code],
             city=location.city,
         )
@@ -103,7 +133,7 @@ class CDEKService:
 
         city = (await self.cdek_api.get_cities(city_to_get))[0]
         delivery_points = await self.cdek_api.get_delivery_points(
-            DeliveryPointsParams(
+            DeliveryPointsParams.model_construct(
                 city_code=city.code,
                 region_code=city.region_code,
             )
@@ -117,33 +147,57 @@ class CDEKService:
             region_code = found_region.region_code
 
             delivery_points = await self.cdek_api.get_delivery_points(
-                DeliveryPointsParams(
+                DeliveryPointsParams.model_construct(
                     region_code=region_code,
                 )
             )
             return delivery_points
         return []
 
-    async def get_delivery_points(self, center: CenterPoint) -> list[SDeliveryPoint]:
+    async def _get_default_regions(self) -> list[RegionResponse]:
+        return await self.cdek_api.get_regions(
+            RegionsParams.model_construct(country_codes=[DEFAULT_COUNTRY_CODE]),
+        )
+
+    async def _get_delivery_points_with_regions(
+        self, center: CenterPoint, regions: list[RegionResponse]
+    ) -> list[SDeliveryPoint]:
+        """Поиск ПВЗ по точке с уже полученными регионами РФ"""
         location = await self.geocoder_service.get_state(center)
+        return await self._get_delivery_points_for_location(location, regions)
+
+    async def _get_delivery_points_for_location(
+        self, location: ParsedLocation | None, regions: list[RegionResponse]
+    ) -> list[SDeliveryPoint]:
         if not location:
             return []
 
-        regions = await self.cdek_api.get_regions(
-            RegionsParams(country_codes=[location.country_code]),
-        )
+        if location.country_code != DEFAULT_COUNTRY_CODE:
+            regions = await self.cdek_api.get_regions(
+                RegionsParams.model_construct(country_codes=[location.country_code]),
+            )
         delivery_points = await self._get_delivery_points_by_state(location, regions)
 
-        return TypeAdapter(
-            list[SDeliveryPoint],
-        ).validate_python([dp.dict() for dp in delivery_points])
+        # Валидируем по атрибутам, без промежуточных dict
+        return DELIVERY_POINT_LIST_ADAPTER.validate_python(
+            delivery_points, from_attributes=True
+        )
+
+    async def get_delivery_points(self, center: CenterPoint) -> list[SDeliveryPoint]:
+        # Почти все точки в России, поэтому регионы РФ запрашиваем параллельно
+        # с геокодированием и перезапрашиваем только для другой страны
+        location, regions = await asyncio.gather(
+            self.geocoder_service.get_state(center),
+            self._get_default_regions(),
+        )
+        return await self._get_delivery_points_for_location(location, regions)
 
     async def get_address(self, point: CenterPoint) -> SAddress | None:
         location = await self.geocoder_service.get_building(point)
         if not location:
             return None
 
-        return SAddress.model_validate(location.dict())
+        return ADDRESS_ADAPTER.validate_python(location, from_attributes=True)
 
     async def calculate_cheapest_tariff(
         self,
@@ -157,7 +211,8 @@ class CDEKService:
         """
         if not user_address_id and not user_delivery_point_id:
             raise HTTPException(
-                status_code=400, detail="Delivery address or point must be provided"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Delivery address or point must be provided",
             )
 
         delivery_mode = DeliveryMode.WAREHOUSE_TO_DOOR
@@ -177,7 +232,8 @@ class CDEKService:
 
         if not user_address_id and not user_delivery_point_id:
             raise HTTPException(
-                status_code=400, detail="Delivery address or point must be provided"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Delivery address or point must be provided",
             )
 
         to_location_data = {}
@@ -188,7 +244,10 @@ class CDEKService:
                 point_id=user_delivery_point_id,
             )
             if not user_delivery_point or not user_delivery_point.cdek_delivery_point:
-                raise HTTPException(status_code=404, detail="Delivery point not found")
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Delivery point not found",
+                )
 
             to_location_data = {
                 "address": user_delivery_point.cdek_delivery_point.address
@@ -200,23 +259,47 @@ class CDEKService:
                 address_id=user_address_id,
             )
             if not user_address:
-                raise HTTPException(status_code=404, detail="User address not found")
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User address not found",
+                )
 
             to_location_data = {"address": user_address.address}
             expected_delivery_mode = DeliveryMode.WAREHOUSE_TO_DOOR
         else:
             raise HTTPException(
-                status_code=400, detail="No delivery destination provided"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No delivery destination provided",
             )
 
+        # Фронтенд пересчитывает тариф при каждом изменении количества,
+        # поэтому результат для одного и того же состава корзины кэшируем
+        cache_key = redis_key_builder.tariff(
+            {
+                "to": to_location_data["address"],
+                "mode": expected_delivery_mode.value,
+                "items": sorted(
+                    (str(item.product_id), item.quantity) for item in items
+                ),
+            }
+        )
+        if cached := await async_redis.get(cache_key):
+            return TariffCode.model_validate_json(cached)
+
         total_weight = 0
         max_length, max_width, max_height = 0, 0, 0
         for item in items:
             product = item.product
             total_weight += (product.weight or 100) * item.quantity
-            max_length = max(max_length, product.length or 100)
-            max_width = max(max_width, product.width or 100)
-            max_height = max(max_height, product.height or 100)
+            length = product.length or 100
+            width = product.width or 100
+            height = product.height or 100
+            if length > max_length:
+                max_length = length
+            if width > max_width:
+                max_width = width
+            if height > max_height:
+                max_height = height
 
         if total_weight == 0:
             total_weight = 100
@@ -247,40 +330,47 @@ class CDEKService:
             )
         )
 
-        logger.debug(
-            "CDEK tariff calculation response", extra={"tariffs": result.model_dump()}
-        )
+        # Список тарифов большой, не сериализуем его, если DEBUG выключен
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "CDEK tariff calculation response",
+                extra={"tariffs": result.model_dump()},
+            )
 
         if result.tariff_codes:
-            suitable_tariffs = sorted(
-                [
+            # При равной стоимости предпочитаем более быструю доставку
+            by_sum_and_period = attrgetter("delivery_sum", "period_min")
+            cheapest = min(
+                (
                     t
                     for t in result.tariff_codes
                     if t.delivery_mode == expected_delivery_mode
-                ],
-                key=lambda x: x.delivery_sum,
+                ),
+                key=by_sum_and_period,
+                default=None,
             )
-            if suitable_tariffs:
-                cheapest = suitable_tariffs[0]
+            if cheapest:
                 logger.info(
                     "Cheapest CDEK tariff found with matching mode",
-                    extra=cheapest.model_dump(),
+                    extra=cheapest.model_dump(mode="json"),
+                )
+                await async_redis.set(
+                    cache_key, cheapest.model_dump_json(), ex=TTL_TARIFF
                 )
                 return cheapest
 
-            all_tariffs_sorted = sorted(
-                result.tariff_codes, key=lambda x: x.delivery_sum
+            cheapest_any_mode = min(result.tariff_codes, key=by_sum_and_period)
+            logger.warning(
+                "No tariff with expected mode found, returning cheapest available",
+                extra={
+                    "expected_mode": expected_delivery_mode.name,
+                    "found_tariff": cheapest_any_mode.model_dump(),
+                },
             )
-            if all_tariffs_sorted:
-                cheapest_any_mode = all_tariffs_sorted[0]
-                logger.warning(
-                    "No tariff with expected mode found, returning cheapest available",
-                    extra={
-                        "expected_mode": expected_delivery_mode.name,
-                        "found_tariff": cheapest_any_mode.model_dump(),
-                    },
-                )
-                return cheapest_any_mode
+            await async_redis.set(
+                cache_key, cheapest_any_mode.model_dump_json(), ex=TTL_TARIFF
+            )
+            return cheapest_any_mode
 
         logger.error(
             "No suitable CDEK tariffs found for the given destination",
@@ -313,43 +403,53 @@ class CDEKService:
             )
             return None
 
-        packages = []
-        for i, item in enumerate(order.items):
-            product = item.product
-            package_item = Item(
-                name=product.name[:100],
-                ware_key=product.sku or str(product.id),
-                cost=float(item.price),
-                weight=product.weight or 100,
-                amount=item.quantity,
-                payment={"value": 0},
-            )
-            packages.append(
-                Package(
-                    number=f"{order.id}-{i + 1}",
-                    weight=package_item.weight * item.quantity,
-                    items=[package_item],
-                    length=product.length or 10,
-                    width=product.width or 10,
-                    height=product.height or 10,
-                )
+        # Упаковки собираются из строк заказа без валидации: типы гарантирует БД.
+        # Контакты и адреса валидируются через общие адаптеры,
+        # сама форма собирается без повторной валидации
+        no_payment = Money.model_construct(value=0)
+        packages = [
+            Package.model_construct(
+                number=f"{order.id}-{i}",
+                weight=(product.weight or 100) * item.quantity,
+                length=product.length or 10,
+                width=product.width or 10,
+                height=product.height or 10,
+                items=[
+                    Item.model_construct(
+                        name=product.name[:100],
+                        ware_key=product.sku or str(product.id),
+                        cost=float(item.price),
+                        weight=product.weight or 100,
+                        amount=item.quantity,
+                        payment=no_payment,
+                    )
+                ],
             )
+            for i, item in enumerate(order.items, start=1)
+            for product in (item.product,)
+        ]
 
-        order_data = OrderCreateForm(
+        order_data = OrderCreateForm.model_construct(
             number=str(order.id),
             tariff_code=order.delivery_tariff_code,
             comment=order.delivery_comment or f"Заказ #{order.id}",
             shipment_point=shipment_point_code,
-            recipient=Contact(
-                name=user.full_name or "Получатель",
-                phones=[Phone(number=user.profile.phone_number or "+79000000000")],
+            recipient=CONTACT_ADAPTER.validate_python(
+                {
+                    "name": user.full_name or "Получатель",
+                    "phones": [
+                        {"number": user.profile.phone_number or "+79000000000"}
+                    ],
+                }
+            ),
+            from_location=REQUEST_LOCATION_ADAPTER.validate_python(
+                {"address": "Россия, Москва, Домодедово (Растуново)"}
             ),
-            from_location=RequestLocation(
-                address="Россия, Москва, Домодедово (Растуново)"
+            to_location=(
+                REQUEST_LOCATION_ADAPTER.validate_python(to_location_data)
+                if to_location_data
+                else None
             ),
-            to_location=RequestLocation(**to_location_data)
-            if to_location_data
-            else None,
             packages=packages,
         )
 
@@ -397,21 +497,19 @@ class CDEKService:
 
     @staticmethod
     def _get_order_comment(user_address: UserAddress) -> str:
-        comment_data = {
-            "квартира": user_address.apartment,
-            "подъезд": user_address.entrance,
-            "этаж": user_address.floor,
-            "код домофона": user_address.intercom_code,
-        }
         return ", ".join(
-            [": ".join([key, value]) for key, value in comment_data.items() if value]
+            f"{label}: {value}"
+            for label, attr in _COMMENT_FIELDS
+            if (value := getattr(user_address, attr))
         ).capitalize()
 
-    async def create_order(self, user: User, db_order_id: UUID) -> bool:
+    async def create_order(
+        self, user: User, user_address: UserAddress, db_order_id: UUID
+    ) -> bool:
         order_data = OrderCreateForm(
             number=db_order_id,
             tariff_code=59,
-            comment=self._get_order_comment(),
+            comment=self._get_order_comment(user_address),
             recipient=self._get_recipient(user),
         )
 
@@ -420,11 +518,10 @@ class CDEKService:
 
         for request in order.requests:
             if request.type == RequestType.CREATE and request.state in request_states:
-                await self._setup_webhooks()
-
+                # Вебхуки настраиваются один раз при запуске приложения
                 logger.info(
                     "Order successfully placed at CDEK",
-                    exc_info={
+                    extra={
                         "im_number": order_data.number,
                     },
                 )
@@ -456,42 +553,39 @@ class CDEKService:
             limit=params.limit,
         )
 
-        # Преобразуем результаты в схему ответа
-        results = []
-        for i, location in enumerate(parsed_locations):
-            # Формируем адрес в нужном формате: "Улица, дом, город, страна"
-            address_parts = []
-
-            # Добавляем улицу и дом (если есть в поле address)
-            if location.address and location.address.strip():
-                address_parts.append(location.address.strip())
-
-            # Добавляем город
-            if location.city and location.city.strip():
-                address_parts.append(location.city.strip())
-
-            # Добавляем страну
-            if location.country and location.country.strip():
-                address_parts.append(location.country.strip())
-
-            formatted_address = ", ".join(address_parts)
-
-            result = SAddressSearchResult(
-                id=f"addr_{i}_{location.latitude}_{location.longitude}",
-                title=formatted_address or "Адрес",
-                subtitle=location.region or "Регион не указан",
-                full_address=formatted_address or "Неизвестный адрес",
-                country=location.country,
-                city=location.city,
-                street=location.street,
-                house=location.house,
-                latitude=location.latitude,
-                longitude=location.longitude,
-                distance_km=getattr(location, "distance_km", None),
-            )
-            results.append(result)
+        if not parsed_locations:
+            return []
 
-        return results
+        return [
+            self._build_address_result(i, location)
+            for i, location in enumerate(parsed_locations)
+        ]
+
+    @staticmethod
+    def _build_address_result(
+        index: int, location: ParsedLocation
+    ) -> SAddressSearchResult:
+        # Формируем адрес в нужном формате: "Улица, дом, город, страна"
+        formatted_address = ", ".join(
+            stripped
+            for part in (location.address, location.city, location.country)
+            if part and (stripped := part.strip())
+        )
+
+        # Данные уже разобраны геокодером, повторная валидация не нужна
+        return SAddressSearchResult.model_construct(
+            id=f"addr_{index}_{location.latitude}_{location.longitude}",
+            title=formatted_address or "Адрес",
+            subtitle=location.region or "Регион не указан",
+            full_address=formatted_address or "Неизвестный адрес",
+            country=location.country,
+            city=location.city,
+            street=location.street,
+            house=location.house,
+            latitude=location.latitude,
+            longitude=location.longitude,
+            distance_km=location.distance_km,
+        )
 
     async def search_delivery_points_by_address(
         self,
@@ -510,10 +604,14 @@ class CDEKService:
         if params.user_latitude is not None and params.user_longitude is not None:
             user_location = Point(params.user_latitude, params.user_longitude)
 
-        # Сначала нужно получить все доступные ПВЗ в регионе
-        # Для этого геокодируем адрес, чтобы понять регион
-        found_addresses = await self.yandex_geocoder_service.search_addresses(
-            query=params.address_query, limit=1
+        # Сначала нужно получить все доступные ПВЗ в регионе.
+        # Для этого геокодируем адрес, чтобы понять регион,
+        # а независимый от адреса список регионов РФ запрашиваем параллельно
+        found_addresses, regions = await asyncio.gather(
+            self.yandex_geocoder_service.search_addresses(
+                query=params.address_query, limit=1
+            ),
+            self._get_default_regions(),
         )
 
         if not found_addresses:
@@ -526,67 +624,45 @@ class CDEKService:
             found_addresses[0].latitude, found_addresses[0].longitude
         )
 
-        # Получаем ПВЗ в регионе через существующий метод
-        delivery_points = await self.get_delivery_points(
-            center=CenterPoint(target_location.latitude, target_location.longitude)
+        # Получаем ПВЗ в регионе по уже полученным регионам
+        delivery_points = await self._get_delivery_points_with_regions(
+            center=CenterPoint(target_location.latitude, target_location.longitude),
+            regions=regions,
         )
 
         # Если нет ПВЗ в регионе, возвращаем пустой список
         if not delivery_points:
             return []
 
-        # Используем YandexGeocoderService для поиска ближайших ПВЗ с учетом расстояний
-        # Преобразуем SDeliveryPoint в формат, который ожидает find_nearest_delivery_points_by_address
-        delivery_points_for_search = []
-        for point in delivery_points:
-            # Создаем простой объект с нужными атрибутами
-            point_obj = SimpleNamespace(
-                location=SimpleNamespace(
-                    latitude=point.location.latitude,
-                    longitude=point.location.longitude,
-                ),
-                uuid=point.uuid,
-                code=point.code,
-                work_time=point.work_time,
-                type=point.type,
-            )
-            delivery_points_for_search.append(point_obj)
-
-        # Находим ближайшие ПВЗ с учетом расстояний
+        # Находим ближайшие ПВЗ с учетом расстояний через YandexGeocoderService
         nearest_points = (
             await self.yandex_geocoder_service.find_nearest_delivery_points_by_address(
                 address_query=params.address_query,
-                delivery_points=delivery_points_for_search,
+                delivery_points=delivery_points,
                 user_location=user_location,
                 target_location=target_location,
                 limit=params.limit,
             )
         )
 
-        # Преобразуем результаты в схему ответа
+        # Преобразуем результаты в схему ответа.
+        # ПВЗ уже провалидированы, повторная валидация не нужна
         results = []
-        for point in nearest_points:
-            # Находим исходный SDeliveryPoint по uuid для получения полной информации
-            original_point = next(
-                (dp for dp in delivery_points if str(dp.uuid) == str(point.uuid)), None
-            )
-
-            if original_point:
-                result = SDeliveryPointSearchResult(
-                    id=str(point.uuid),
+        for nearest in nearest_points:
+            point = nearest["point"]
+            address = point.location.address or "Адрес не указан"
+            results.append(
+                SDeliveryPointSearchResult.model_construct(
+                    id=point.uuid,
                     title=f"ПВЗ {point.code}",
-                    subtitle=original_point.location.address or "Адрес не указан",
-                    address=original_point.location.address or "Адрес не указан",
+                    subtitle=address,
+                    address=address,
                     latitude=point.location.latitude,
                     longitude=point.location.longitude,
-                    distance_km=getattr(point, "distance_from_user_km", None),
+                    distance_km=nearest["distance_from_user_km"],
                     work_time=point.work_time or "Время работы не указано",
-                    office_type=(
-                        str(point.type.value)
-                        if hasattr(point.type, "value")
-                        else str(point.type)
-                    ),
+                    office_type=str(point.type.value),
                 )
-                results.append(result)
+            )
 
         return results
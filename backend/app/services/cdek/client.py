@@ -1,16 +1,112 @@
+import asyncio
+from typing import Optional
+
 import httpx
 
 from app.core.settings import settings
 
+CDEK_CLIENT_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+CDEK_CLIENT_TIMEOUT = httpx.Timeout(10.0)
+
+# Границы числа одновременных запросов к CDEK для AIMD-регулятора
+CDEK_CONCURRENCY_INITIAL = 16
+CDEK_CONCURRENCY_MIN = 1
+CDEK_CONCURRENCY_MAX = 64
+# Доля оставшейся квоты, при которой заранее снижаем нагрузку
+CDEK_RATELIMIT_LOW_WATERMARK = 0.1
+
+
+class AIMDLimiter:
+    """
+    Адаптивное ограничение одновременных запросов (AIMD):
+    успешный ответ понемногу увеличивает лимит, 429/5xx или ошибка сети
+    уменьшают его вдвое. Retry-After приостанавливает новые запросы
+    """
+
+    def __init__(
+        self,
+        initial: int = CDEK_CONCURRENCY_INITIAL,
+        minimum: int = CDEK_CONCURRENCY_MIN,
+        maximum: int = CDEK_CONCURRENCY_MAX,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self._in_flight = 0
+        self._resume_at = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        delay = self._resume_at - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self, response: Optional[httpx.Response]) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._adjust(response)
+            self._condition.notify_all()
+
+    def _adjust(self, response: Optional[httpx.Response]) -> None:
+        if response is None or response.status_code == 429 or response.is_server_error:
+            self.limit = max(self.minimum, self.limit / 2)
+            if response is not None:
+                self._pause(response.headers.get("Retry-After"))
+        elif self._is_quota_low(response.headers):
+            self.limit = max(self.minimum, self.limit / 2)
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def _pause(self, retry_after: Optional[str]) -> None:
+        try:
+            seconds = float(retry_after)
+        except (TypeError, ValueError):
+            return
+        resume_at = asyncio.get_running_loop().time() + seconds
+        self._resume_at = max(self._resume_at, resume_at)
+
+    @staticmethod
+    def _is_quota_low(headers: httpx.Headers) -> bool:
+        try:
+            remaining = int(headers["X-Ratelimit-Remaining"])
+            limit = int(headers["X-Ratelimit-Limit"])
+        except (KeyError, ValueError):
+            return False
+        return limit > 0 and remaining <= limit * CDEK_RATELIMIT_LOW_WATERMARK
+
 
 class CDEKAsyncClient(httpx.AsyncClient):
     access_token: str = ""
     token_expires_at: float = 0.0
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Клиент общий для всего приложения, поэтому и блокировка обновления токена
+        self.token_lock = asyncio.Lock()
+        self.limiter = AIMDLimiter()
+
+
+_cdek_async_client: Optional[CDEKAsyncClient] = None
+
 
-def get_cdek_async_client(base_url: str = settings.CDEK_BASE_URL) -> CDEKAsyncClient:
-    if settings.CDEK_TEST_MODE:
-        base_url = settings.CDEK_TEST_BASE_URL
+def get_cdek_async_client() -> CDEKAsyncClient:
+    """
+    Общий для приложения клиент CDEK: пул соединений и токен переиспользуются
+    между запросами. Закрывается при остановке приложения
+    """
+    global _cdek_async_client
+    if _cdek_async_client is None or _cdek_async_client.is_closed:
+        base_url = settings.CDEK_BASE_URL
+        if settings.CDEK_TEST_MODE:
+            base_url = settings.CDEK_TEST_BASE_URL
 
-    client = CDEKAsyncClient(base_url=base_url)
-    return client
+        _cdek_async_client = CDEKAsyncClient(
+            base_url=base_url,
+            limits=CDEK_CLIENT_LIMITS,
+            timeout=CDEK_CLIENT_TIMEOUT,
+        )
+    return _cdek_async_client
@@ -2,20 +2,37 @@ import functools
 from enum import Enum
 from typing import Any, Awaitable, Callable, Optional, TypeVar
 
-from pydantic import TypeAdapter
-from shapely.geometry import Point, box
-
 from app.core.logger import logger
 from app.core.redis import async_redis
-from app.services.cdek.geocoder.schemas import ParsedLocation
+from app.services.cdek.cache import LocalTTLCache
+from app.services.cdek.geocoder.schemas import (
+    PARSED_LOCATION_ADAPTER,
+    PARSED_LOCATION_LIST_ADAPTER,
+    ParsedLocation,
+)
+from app.services.cdek.geocoder.utils import normalize_address_query
 from app.utils.cache import RedisKeyBuilder
 
 TTL_REGIONS = 86400  # 24 часа
+# Адреса и здания меняются редко, а запросы к геокодеру дорогие
+TTL_ADDRESSES = 3 * 86400  # 3 дня
+TTL_BUILDINGS = 3 * 86400  # 3 дня
+# Точность округления координат для кэша зданий, 4 знака — около 11 метров
+BUILDING_COORDINATES_PRECISION = 4
+# Копия найденных регионов в памяти процесса, 3 знака — около 100 метров
+LOCAL_TTL_REGIONS = 300  # 5 минут
+LOCAL_REGIONS_MAXSIZE = 4096
+REGION_COORDINATES_PRECISION = 3
+# Копия результатов поиска адресов в памяти процесса
+LOCAL_TTL_ADDRESSES = 86400  # 24 часа
+LOCAL_ADDRESSES_MAXSIZE = 10_000
 
 
 class GeocoderCacheKey(str, Enum):
     REGIONS = "regions"
     REGIONS_GEO = "regions_geo"
+    ADDRESSES = "addresses"
+    BUILDINGS = "buildings"
 
 
 class GeocoderRedisKeyBuilder(RedisKeyBuilder):
@@ -28,6 +45,22 @@ class GeocoderRedisKeyBuilder(RedisKeyBuilder):
     def regions_geo(self, params: dict = None, *, use_hash: bool = False) -> str:
         return self.build(GeocoderCacheKey.REGIONS_GEO, params, use_hash=use_hash)
 
+    def addresses(self, query: str, limit: int) -> str:
+        return self.build(
+            GeocoderCacheKey.ADDRESSES,
+            {"query": normalize_address_query(query), "limit": limit},
+            use_hash=True,
+        )
+
+    def buildings(self, lat: float, lon: float) -> str:
+        return self.build(
+            GeocoderCacheKey.BUILDINGS,
+            {
+                "lat": round(lat, BUILDING_COORDINATES_PRECISION),
+                "lon": round(lon, BUILDING_COORDINATES_PRECISION),
+            },
+        )
+
 
 async def add_region_to_cache(
     region_id: str,
@@ -58,18 +91,87 @@ async def get_region_details(region_id: str) -> Optional[ParsedLocation]:
     cache_key = redis_key_builder.regions(str(region_id))
     data = await async_redis.get(cache_key)
     if data:
-        return TypeAdapter(ParsedLocation).validate_json(data)
+        return PARSED_LOCATION_ADAPTER.validate_json(data)
     return None
 
 
-def is_point_in_bbox(point: Point, bbox: tuple) -> bool:
+_local_addresses = LocalTTLCache(LOCAL_TTL_ADDRESSES, maxsize=LOCAL_ADDRESSES_MAXSIZE)
+
+
+async def get_cached_addresses(
+    query: str, limit: int
+) -> Optional[list[ParsedLocation]]:
+    cache_key = redis_key_builder.addresses(query, limit)
+    locations = _local_addresses.get(cache_key)
+    if locations is None:
+        data = await async_redis.get(cache_key)
+        if not data:
+            return None
+        locations = tuple(PARSED_LOCATION_LIST_ADAPTER.validate_json(data))
+        _local_addresses.set(cache_key, locations)
+
+    # Вызывающий дополняет адреса расстоянием, поэтому отдаем копии
+    return [location.model_copy() for location in locations]
+
+
+async def add_addresses_to_cache(
+    query: str,
+    limit: int,
+    locations: list[ParsedLocation],
+    ttl: int = TTL_ADDRESSES,
+):
+    cache_key = redis_key_builder.addresses(query, limit)
+    await async_redis.set(
+        cache_key,
+        PARSED_LOCATION_LIST_ADAPTER.dump_json(locations, exclude_none=True),
+        ex=ttl,
+    )
+    _local_addresses.set(
+        cache_key, tuple(location.model_copy() for location in locations)
+    )
+
+
+async def get_cached_building(lat: float, lon: float) -> Optional[ParsedLocation]:
+    data = await async_redis.get(redis_key_builder.buildings(lat, lon))
+    if data:
+        return PARSED_LOCATION_ADAPTER.validate_json(data)
+    return None
+
+
+async def add_building_to_cache(
+    location_data: ParsedLocation,
+    ttl: int = TTL_BUILDINGS,
+):
+    await async_redis.set(
+        redis_key_builder.buildings(location_data.latitude, location_data.longitude),
+        location_data.model_dump_json(exclude_none=True),
+        ex=ttl,
+    )
+
+
+def is_point_in_bbox(lat: float, lon: float, bbox: tuple) -> bool:
     min_lat, max_lat, min_lon, max_lon = bbox
-    region_box = box(min_lon, min_lat, max_lon, max_lat)
-    return region_box.contains(point)
+    return min_lon <= lon <= max_lon and min_lat <= lat <= max_lat
+
+
+_local_regions = LocalTTLCache(LOCAL_TTL_REGIONS, maxsize=LOCAL_REGIONS_MAXSIZE)
 
 
 async def get_cached_region(lat: float, lon: float) -> Optional[ParsedLocation]:
-    point = Point(lon, lat)
+    local_key = (
+        f"{round(lat, REGION_COORDINATES_PRECISION)}:"
+        f"{round(lon, REGION_COORDINATES_PRECISION)}"
+    )
+    if region_data := _local_regions.get(local_key):
+        return region_data
+
+    region_data = await _find_cached_region(lat, lon)
+    if region_data:
+        _local_regions.set(local_key, region_data)
+    return region_data
+
+
+async def _find_cached_region(lat: float, lon: float) -> Optional[ParsedLocation]:
     radius_m = 150_000
 
     candidate_ids = await async_redis.geosearch(
@@ -79,15 +181,22 @@ async def get_cached_region(lat: float, lon: float) -> Optional[ParsedLocation]:
         radius=radius_m,
         unit="m",
     )
+    logger.debug("Candidate region ids: %s", candidate_ids)
 
-    print(candidate_ids)
+    if not candidate_ids:
+        return None
 
-    for region_id in candidate_ids:
-        region_data = await get_region_details(region_id)
-        print(region_data)
-        if region_data and region_data.bbox:
+    # Данные всех регионов-кандидатов получаем одним запросом
+    regions_data = await async_redis.mget(
+        [redis_key_builder.regions(str(region_id)) for region_id in candidate_ids]
+    )
+    for data in regions_data:
+        if not data:
+            continue
+        region_data = PARSED_LOCATION_ADAPTER.validate_json(data)
+        if region_data.bbox:
             bbox = tuple(region_data.bbox)
-            if is_point_in_bbox(point, bbox):
+            if is_point_in_bbox(lat, lon, bbox):
                 logger.info(f"Location from user input found in geo cache: ")
                 return region_data
     return None
@@ -8,10 +8,39 @@ from geopy.point import Point
 
 from app.core.logger import logger
 from app.services.cdek.geocoder.base import GeocoderService
-from app.services.cdek.geocoder.cache import add_region_to_cache, get_cached_region
+from app.services.cdek.geocoder.cache import (
+    add_building_to_cache,
+    add_region_to_cache,
+    get_cached_building,
+    get_cached_region,
+)
 from app.services.cdek.geocoder.schemas import ParsedLocation
 
 
+_nominatim: Optional[Nominatim] = None
+
+
+def get_nominatim() -> Nominatim:
+    """
+    Общий для приложения клиент Nominatim: сессия aiohttp создаётся при первом
+    запросе и переиспользует соединения. Закрывается при остановке приложения
+    """
+    global _nominatim
+    if _nominatim is None:
+        _nominatim = Nominatim(
+            user_agent="cdek-geocoder",
+            adapter_factory=AioHTTPAdapter,
+        )
+    return _nominatim
+
+
+async def close_nominatim() -> None:
+    global _nominatim
+    if _nominatim is not None:
+        await _nominatim.__aexit__(None, None, None)
+        _nominatim = None
+
+
 class NominatimGeocoderService(GeocoderService["Nominatim"]):
     def __init__(self):
         self.zoom_levels = {
@@ -28,20 +57,16 @@ class NominatimGeocoderService(GeocoderService["Nominatim"]):
         zoom: int = 13,
         addressdetails: bool = True,
     ) -> Optional[Location]:
-        async with Nominatim(
-            user_agent="cdek-geocoder",
-            adapter_factory=AioHTTPAdapter,
-        ) as geolocator:
-            try:
-                return await geolocator.reverse(
-                    point,
-                    exactly_one=True,
-                    language=language,
-                    zoom=zoom,
-                    addressdetails=addressdetails,
-                )
-            except Exception as e:
-                logger.error("Failed using geocoder: %s", e)
+        try:
+            return await get_nominatim().reverse(
+                point,
+                exactly_one=True,
+                language=language,
+                zoom=zoom,
+                addressdetails=addressdetails,
+            )
+        except Exception as e:
+            logger.error("Failed using geocoder: %s", e)
         return None
 
     async def get_state(self, point: Point) -> Optional[ParsedLocation]:
@@ -54,7 +79,7 @@ class NominatimGeocoderService(GeocoderService["Nominatim"]):
         if not location:
             return None
 
-        print(location.raw)
+        logger.debug("Nominatim response: %s", location.raw)
         geo_object = location.raw
         address: dict = geo_object.get("address") or {}
 
@@ -70,13 +95,19 @@ class NominatimGeocoderService(GeocoderService["Nominatim"]):
         return parsed
 
     async def get_building(self, point: Point) -> Optional[ParsedLocation]:
+        if cached := await get_cached_building(point.latitude, point.longitude):
+            # Кэш общий для соседних точек, координаты берём из запроса
+            return cached.model_copy(
+                update={"latitude": point.latitude, "longitude": point.longitude}
+            )
+
         zoom_level = self.zoom_levels["building"]
         location = await self.reverse(point, zoom=zoom_level)
 
         if not location:
             return None
 
-        print(location.raw)
+        logger.debug("Nominatim response: %s", location.raw)
         geo_object = location.raw
         address: dict = geo_object.get("address") or {}
 
@@ -90,7 +121,7 @@ class NominatimGeocoderService(GeocoderService["Nominatim"]):
         if not city:
             return None
 
-        return ParsedLocation(
+        parsed = ParsedLocation(
             country=address.get("country"),
             country_code=address.get("country_code"),
             region=address.get("state"),
@@ -99,6 +130,8 @@ class NominatimGeocoderService(GeocoderService["Nominatim"]):
             longitude=point.longitude,
             latitude=point.latitude,
         )
+        await add_building_to_cache(parsed)
+        return parsed
 
 
 async def main():
@@ -107,6 +140,7 @@ async def main():
 
     location = await geocoder.get_building(point)
     print("\nLocation: ", location)
+    await close_nominatim()
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 
 class ParsedLocation(BaseModel):
@@ -27,3 +27,7 @@ class ParsedLocation(BaseModel):
             self.address,
         ]
         return ", ".join(filter(None, parts))
+
+
+PARSED_LOCATION_ADAPTER = TypeAdapter(ParsedLocation)
+PARSED_LOCATION_LIST_ADAPTER = TypeAdapter(list[ParsedLocation])
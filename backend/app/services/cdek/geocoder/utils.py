@@ -1,17 +1,28 @@
+import functools
 import re
 from typing import Optional
 
 from app.schemas.cdek.response import RegionResponse
 
+_RE_REPUBLIC = re.compile(r"\bреспублика\b")
+_RE_PARENS = re.compile(r"\(.*?\)")
+_RE_WS = re.compile(r"\s+")
 
+
+# Названия регионов повторяются между запросами, поэтому результат кэшируем
+@functools.lru_cache(maxsize=4096)
 def normalize_region_name(name: str) -> str:
     name = name.lower()
-    name = re.sub(r"\bреспублика\b", "", name)
-    name = re.sub(r"\(.*?\)", "", name)
-    name = re.sub(r"\s+", " ", name).strip()
+    name = _RE_REPUBLIC.sub("", name)
+    name = _RE_PARENS.sub("", name)
+    name = _RE_WS.sub(" ", name).strip()
     return name
 
 
+def normalize_address_query(query: str) -> str:
+    return _RE_WS.sub(" ", query.lower()).strip()
+
+
 def find_region_by_name(
     geocoder_region: str,
     regions: list[RegionResponse],
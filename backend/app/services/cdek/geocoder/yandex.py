@@ -1,14 +1,109 @@
-from geopy import distance
+import asyncio
+import functools
+import math
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+import numpy as np
 from geopy.adapters import AioHTTPAdapter
-from geopy.exc import GeocoderInsufficientPrivileges, GeocoderServiceError
+from geopy.exc import (
+    GeocoderInsufficientPrivileges,
+    GeocoderServiceError,
+    GeocoderTimedOut,
+    GeocoderUnavailable,
+)
+from geopy.extra.rate_limiter import AsyncRateLimiter
 from geopy.geocoders import Yandex
 from geopy.location import Location
 from geopy.point import Point
 
 from app.core.logger import logger
 from app.services.cdek.geocoder.base import GeocoderService
+from app.services.cdek.geocoder.cache import (
+    add_addresses_to_cache,
+    get_cached_addresses,
+)
 from app.services.cdek.geocoder.schemas import ParsedLocation
 
+EARTH_RADIUS_KM = 6371.0
+# Одновременных запросов к геокодеру при пакетном поиске адресов
+BATCH_CONCURRENCY = 10
+# Минимальный интервал между запросами прямого геокодирования (не больше 20 в секунду)
+# и повторы при временных ошибках сервиса
+GEOCODE_MIN_DELAY_SECONDS = 0.05
+GEOCODE_MAX_RETRIES = 2
+GEOCODE_ERROR_WAIT_SECONDS = 1.0
+
+# Компоненты адреса, которые используются при разборе ответа геокодера
+COMPONENT_KINDS = frozenset({"country", "province", "locality", "street", "house"})
+
+_yandex: Optional[Yandex] = None
+_yandex_geocode: Optional[AsyncRateLimiter] = None
+
+
+def get_yandex(api_key: str) -> Yandex:
+    """
+    Общий для приложения клиент Яндекс геокодера: сессия aiohttp создаётся
+    при первом запросе и переиспользует соединения. Закрывается при остановке
+    приложения
+    """
+    global _yandex
+    if _yandex is None:
+        _yandex = Yandex(
+            api_key=api_key,
+            adapter_factory=AioHTTPAdapter,
+            timeout=10,
+        )
+    return _yandex
+
+
+def get_yandex_geocode(api_key: str) -> AsyncRateLimiter:
+    """
+    Прямое геокодирование общего клиента с ограничением частоты запросов.
+    Ограничение общее для всех запросов приложения, в том числе пакетных
+    """
+    global _yandex_geocode
+    if _yandex_geocode is None:
+        _yandex_geocode = AsyncRateLimiter(
+            get_yandex(api_key).geocode,
+            min_delay_seconds=GEOCODE_MIN_DELAY_SECONDS,
+            # Повторяются только временные ошибки, см. _geocode_with_retries.
+            # Ошибки ключа и квоты повторять бессмысленно
+            max_retries=0,
+            swallow_exceptions=False,
+        )
+    return _yandex_geocode
+
+
+async def close_yandex() -> None:
+    global _yandex, _yandex_geocode
+    _yandex_geocode = None
+    if _yandex is not None:
+        await _yandex.__aexit__(None, None, None)
+        _yandex = None
+
+
+@functools.lru_cache(maxsize=2048)
+def _parse_components_cached(
+    components_key: tuple[tuple[str, str], ...],
+) -> Mapping[str, str]:
+    result = {}
+    province_count = 0
+
+    for kind, name in components_key:
+        if kind == "province":
+            province_count += 1
+            if province_count == 2:
+                result[kind] = name
+        elif kind in COMPONENT_KINDS and kind not in result:
+            result[kind] = name
+
+        if len(result) == len(COMPONENT_KINDS):
+            break
+
+    # Результат общий для всех вызовов из кэша, поэтому отдаем его только для чтения
+    return MappingProxyType(result)
+
 
 class YandexGeocoderService(GeocoderService["YandexGeocoderService"]):
     def __init__(self, api_key: str):
@@ -20,17 +115,11 @@ class YandexGeocoderService(GeocoderService["YandexGeocoderService"]):
         exactly_one: bool = True,
         kind: str = None,
     ) -> Location | None:
-        async with Yandex(
-            api_key=self.api_key,
-            adapter_factory=AioHTTPAdapter,
-            timeout=10,
-        ) as geolocator:
-            try:
-                return await geolocator.reverse(
-                    point, exactly_one=exactly_one, kind=kind
-                )
-            except Exception as e:
-                logger.error("Failed using geocoder: %s", e)
+        geolocator = get_yandex(self.api_key)
+        try:
+            return await geolocator.reverse(point, exactly_one=exactly_one, kind=kind)
+        except Exception as e:
+            logger.error("Failed using geocoder: %s", e)
         return None
 
     async def search_addresses(
@@ -50,61 +139,100 @@ class YandexGeocoderService(GeocoderService["YandexGeocoderService"]):
         Returns:
             Список найденных адресов с координатами
         """
-        async with Yandex(
-            api_key=self.api_key,
-            adapter_factory=AioHTTPAdapter,
-            timeout=10,
-        ) as geolocator:
-            try:
-                # Используем прямое геокодирование - поиск координат по адресу
-                locations = await geolocator.geocode(query, exactly_one=False)
+        # Повторные запросы с тем же адресом не отправляем в Яндекс
+        parsed_locations = await get_cached_addresses(query, limit)
+        if parsed_locations is None:
+            parsed_locations = await self._geocode_addresses(query, limit)
+            if parsed_locations:
+                await add_addresses_to_cache(query, limit, parsed_locations)
+
+        # Если указано местоположение пользователя, рассчитываем расстояние
+        if user_location:
+            user_lat, user_lon = user_location.latitude, user_location.longitude
+            for parsed_location in parsed_locations:
+                # Добавляем расстояние как дополнительное поле для сортировки
+                parsed_location.distance_km = self.distance_km(
+                    parsed_location.latitude,
+                    parsed_location.longitude,
+                    user_lat,
+                    user_lon,
+                )
 
-                if not locations:
-                    return []
+            # Сортируем по расстоянию
+            parsed_locations.sort(
+                key=lambda loc: getattr(loc, "distance_km", float("inf"))
+            )
 
-                # Ограничиваем количество результатов вручную
-                if limit:
-                    locations = locations[:limit]
-
-                parsed_locations = []
-                for location in locations:
-                    parsed_location = await self._parse_location_from_raw(location)
-                    if parsed_location:
-                        # Если указано местоположение пользователя, рассчитываем расстояние
-                        if user_location:
-                            dist_km = self.calculate_distance(
-                                Point(
-                                    parsed_location.latitude, parsed_location.longitude
-                                ),
-                                user_location,
-                            )
-                            # Добавляем расстояние как дополнительное поле для сортировки
-                            parsed_location.distance_km = dist_km
-
-                        parsed_locations.append(parsed_location)
-
-                # Сортируем по расстоянию, если есть координаты пользователя
-                if user_location:
-                    parsed_locations.sort(
-                        key=lambda loc: getattr(loc, "distance_km", float("inf"))
-                    )
-
-                return parsed_locations
-
-            except GeocoderInsufficientPrivileges as e:
-                logger.error(
-                    "Yandex geocoder API key is invalid or has insufficient privileges: %s",
-                    e,
-                    exc_info=True,
-                )
-                return []
-            except GeocoderServiceError as e:
-                logger.error("Yandex geocoder request failed: %s", e, exc_info=True)
-                return []
-            except Exception as e:
-                logger.error("Failed to search addresses: %s", e, exc_info=True)
+        return parsed_locations
+
+    async def search_addresses_batch(
+        self,
+        queries: list[str],
+        limit: int = 10,
+    ) -> list[list[ParsedLocation]]:
+        """
+        Поиск адресов по нескольким запросам параллельно.
+
+        Args:
+            queries: Текстовые запросы для поиска адресов
+            limit: Максимальное количество результатов на запрос
+
+        Returns:
+            Списки найденных адресов в порядке запросов
+        """
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def search(query: str) -> list[ParsedLocation]:
+            async with semaphore:
+                return await self.search_addresses(query, limit=limit)
+
+        return await asyncio.gather(*(search(query) for query in queries))
+
+    async def _geocode_addresses(self, query: str, limit: int) -> list[ParsedLocation]:
+        try:
+            # Используем прямое геокодирование - поиск координат по адресу
+            locations = await self._geocode_with_retries(query)
+
+            if not locations:
                 return []
 
+            # Ограничиваем количество результатов вручную
+            if limit:
+                locations = locations[:limit]
+
+            parsed_locations = []
+            for location in locations:
+                parsed_location = await self._parse_location_from_raw(location)
+                if parsed_location:
+                    parsed_locations.append(parsed_location)
+
+            return parsed_locations
+
+        except GeocoderInsufficientPrivileges as e:
+            logger.error(
+                "Yandex geocoder API key is invalid or has insufficient privileges: %s",
+                e,
+                exc_info=True,
+            )
+            return []
+        except GeocoderServiceError as e:
+            logger.error("Yandex geocoder request failed: %s", e, exc_info=True)
+            return []
+        except Exception as e:
+            logger.error("Failed to search addresses: %s", e, exc_info=True)
+            return []
+
+    async def _geocode_with_retries(self, query: str) -> list[Location] | None:
+        geocode = get_yandex_geocode(self.api_key)
+        for attempt in range(GEOCODE_MAX_RETRIES + 1):
+            try:
+                return await geocode(query, exactly_one=False)
+            except (GeocoderTimedOut, GeocoderUnavailable) as e:
+                if attempt == GEOCODE_MAX_RETRIES:
+                    raise
+                logger.warning("Yandex geocoder is unavailable, retrying: %s", e)
+                await asyncio.sleep(GEOCODE_ERROR_WAIT_SECONDS)
+
     @staticmethod
     def calculate_distance(
         point1: Point,
@@ -120,14 +248,65 @@ class YandexGeocoderService(GeocoderService["YandexGeocoderService"]):
         Returns:
             Расстояние в километрах
         """
-        try:
-            return distance.distance(
-                (point1.latitude, point1.longitude), (point2.latitude, point2.longitude)
-            ).kilometers
-        except Exception as e:
-            logger.error("Failed to calculate distance: %s", e)
+        return YandexGeocoderService.distance_km(
+            point1.latitude, point1.longitude, point2.latitude, point2.longitude
+        )
+
+    @staticmethod
+    def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        """
+        Расчет расстояния между двумя точками в километрах по координатам,
+        без создания объектов Point.
+
+        Args:
+            lat1: Широта первой точки
+            lon1: Долгота первой точки
+            lat2: Широта второй точки
+            lon2: Долгота второй точки
+
+        Returns:
+            Расстояние в километрах
+        """
+        if not all(map(math.isfinite, (lat1, lon1, lat2, lon2))):
+            logger.error("Failed to calculate distance: invalid coordinates")
             return float("inf")
 
+        # Для ранжирования ПВЗ точности сферической модели достаточно
+        lat1, lat2 = math.radians(lat1), math.radians(lat2)
+        dlat = lat2 - lat1
+        dlon = math.radians(lon2 - lon1)
+        a = (
+            math.sin(dlat / 2) ** 2
+            + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+    @staticmethod
+    def haversine_km(
+        lat_rad: np.ndarray,
+        lon_rad: np.ndarray,
+        lat: float,
+        lon: float,
+    ) -> np.ndarray:
+        """
+        Расстояние по формуле гаверсинуса от массива точек до одной точки.
+
+        Args:
+            lat_rad: Широты точек в радианах
+            lon_rad: Долготы точек в радианах
+            lat: Широта целевой точки в градусах
+            lon: Долгота целевой точки в градусах
+
+        Returns:
+            Массив расстояний в километрах
+        """
+        lat0, lon0 = np.radians(lat), np.radians(lon)
+        a = (
+            np.sin((lat_rad - lat0) / 2) ** 2
+            + np.cos(lat_rad) * np.cos(lat0) * np.sin((lon_rad - lon0) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
     async def find_nearest_delivery_points_by_address(
         self,
         address_query: str,
@@ -153,7 +332,8 @@ class YandexGeocoderService(GeocoderService["YandexGeocoderService"]):
             limit: Максимальное количество результатов
 
         Returns:
-            Отсортированный список ПВЗ с расчетом расстояний
+            Отсортированный список словарей с ПВЗ ("point") и расстояниями
+            ("distance_to_target_km", "distance_from_user_km")
         """
         try:
             # Если координаты целевого адреса не переданы, находим их
@@ -166,53 +346,63 @@ class YandexGeocoderService(GeocoderService["YandexGeocoderService"]):
                     found_addresses[0].latitude, found_addresses[0].longitude
                 )
 
-            # Рассчитываем расстояния и добавляем метрики для каждого ПВЗ
-            points_with_distance = []
-            for point in delivery_points:
-                # Получаем координаты ПВЗ
-                point_location = Point(
-                    point.location.latitude, point.location.longitude
-                )
+            if not delivery_points:
+                return []
 
-                # Расстояние от ПВЗ до целевого адреса
-                distance_to_target = self.calculate_distance(
-                    point_location, target_location
+            # Расстояния до всех ПВЗ считаем разом по массивам координат,
+            # переводя их в радианы один раз для обоих расчетов
+            count = len(delivery_points)
+            lat_rad = np.radians(
+                np.fromiter(
+                    (point.location.latitude for point in delivery_points),
+                    dtype=np.float64,
+                    count=count,
                 )
-
-                # Расстояние от пользователя до ПВЗ (если указано местоположение пользователя)
-                distance_from_user = 0.0
-                if user_location:
-                    distance_from_user = self.calculate_distance(
-                        point_location, user_location
-                    )
-
-                # Рассчитываем общий показатель удобства
-                # Приоритет: близость к целевому адресу важнее, но учитываем и расстояние от пользователя
-                convenience_score = distance_to_target + (distance_from_user * 0.3)
-
-                points_with_distance.append(
-                    {
-                        "point": point,
-                        "distance_to_target_km": distance_to_target,
-                        "distance_from_user_km": distance_from_user,
-                        "convenience_score": convenience_score,
-                    }
+            )
+            lon_rad = np.radians(
+                np.fromiter(
+                    (point.location.longitude for point in delivery_points),
+                    dtype=np.float64,
+                    count=count,
                 )
+            )
 
-            # Сортируем по показателю удобства (меньше = лучше)
-            points_with_distance.sort(key=lambda x: x["convenience_score"])
-
-            # Возвращаем топ результатов с добавленной информацией о расстояниях
-            result = []
-            for item in points_with_distance[:limit]:
-                point = item["point"]
-                # Добавляем информацию о расстояниях как дополнительные поля
-                if hasattr(point, "__dict__"):
-                    point.distance_to_target_km = item["distance_to_target_km"]
-                    point.distance_from_user_km = item["distance_from_user_km"]
-                result.append(point)
+            # Расстояние от ПВЗ до целевого адреса
+            distance_to_target = self.haversine_km(
+                lat_rad, lon_rad, target_location.latitude, target_location.longitude
+            )
 
-            return result
+            # Расстояние от пользователя до ПВЗ (если указано местоположение пользователя)
+            if user_location:
+                distance_from_user = self.haversine_km(
+                    lat_rad, lon_rad, user_location.latitude, user_location.longitude
+                )
+            else:
+                distance_from_user = np.zeros(count)
+
+            # Рассчитываем общий показатель удобства
+            # Приоритет: близость к целевому адресу важнее, но учитываем и расстояние от пользователя
+            convenience_score = distance_to_target + distance_from_user * 0.3
+
+            # Отбираем лучшие без полной сортировки и упорядочиваем только их
+            # (меньше = лучше)
+            if limit < count:
+                top = np.argpartition(convenience_score, limit)[:limit]
+            else:
+                top = np.arange(count)
+            top = top[np.argsort(convenience_score[top], kind="stable")]
+
+            # Возвращаем топ результатов вместе с расстояниями,
+            # сами ПВЗ не изменяем
+            return [
+                {
+                    "point": delivery_points[i],
+                    "distance_to_target_km": float(distance_to_target[i]),
+                    "distance_from_user_km": float(distance_from_user[i]),
+                    "convenience_score": float(convenience_score[i]),
+                }
+                for i in top
+            ]
 
         except Exception as e:
             logger.error("Failed to find nearest delivery points: %s", e)
@@ -269,22 +459,12 @@ class YandexGeocoderService(GeocoderService["YandexGeocoderService"]):
             return None
 
     @staticmethod
-    def _parse_location_components(components: list[dict]) -> dict:
-        result = {}
-        province_count = 0
-
-        for component in components:
-            kind = component["kind"]
-            name = component["name"]
-
-            if kind == "province":
-                province_count += 1
-                if province_count == 2:
-                    result[kind] = name
-            elif kind not in result:
-                result[kind] = name
-
-        return result
+    def _parse_location_components(components: list[dict]) -> Mapping[str, str]:
+        return _parse_components_cached(
+            tuple(
+                (component["kind"], component["name"]) for component in components or ()
+            )
+        )
 
     async def get_location_by_point(
         self,
@@ -1,6 +1,14 @@
 # app/services/export/export_service.py
 from datetime import datetime
-from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    BinaryIO,
+    Dict,
+    Optional,
+    Tuple,
+)
 
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -15,6 +23,25 @@ from app.utils.export_utils import generate_csv, generate_excel
 class ExportService:
     """Сервис для экспорта данных"""
 
+    # Соответствие ключей строки экспорта заголовкам столбцов
+    _ORDER_EXPORT_HEADERS = {
+        "id": "ID заказа",
+        "status": "Статус",
+        "created_at": "Дата создания",
+        "delivery_method": "Способ доставки",
+        "delivery_address": "Адрес доставки",
+        "payment_method": "Способ оплаты",
+        "payment_status": "Статус оплаты",
+        "subtotal": "Стоимость товаров",
+        "delivery_cost": "Стоимость доставки",
+        "total": "Итого",
+        "user_id": "ID пользователя",
+        "user_name": "Имя пользователя",
+        "user_telegram": "Telegram",
+        "items_count": "Количество товаров",
+        "items_details": "Товары",
+    }
+
     def __init__(self, session: AsyncSession, order_crud: OrderCRUD):
         self.session = session
         self.order_crud = order_crud
@@ -36,40 +63,31 @@ class ExportService:
             # Преобразуем фильтры в словарь
             filter_dict = filters.dict(exclude_none=True) if filters else None
 
-            # Получаем заказы с применением фильтров
-            orders, total = await self.order_crud.get_orders_for_admin(
-                skip=0,  # При экспорте не ограничиваем количество
-                limit=10000,  # Ставим большой лимит для экспорта
-                filters=filter_dict,
-            )
-
             logger.info(
                 "Preparing orders data for export",
                 extra={
                     "format": export_format,
-                    "orders_count": len(orders),
                     "filters": filter_dict,
                 },
             )
 
-            # Преобразуем данные заказов в формат для экспорта
-            export_data = self._prepare_orders_export_data(orders)
-
-            # Определяем заголовки для экспорта
-            headers = self._get_order_export_headers()
+            # Заказы читаются из БД страницами и сразу превращаются в строки
+            # экспорта, поэтому память не зависит от их количества
+            orders = self.order_crud.iter_orders_for_admin(filters=filter_dict)
+            export_data = self._iter_orders_export_rows(orders)
 
             # Текущая дата для имени файла
             current_date = datetime.now().strftime("%Y%m%d_%H%M%S")
 
             # Генерируем файл в зависимости от формата
             if export_format == ExportFormat.CSV:
-                output = generate_csv(export_data, headers)
+                output = await generate_csv(export_data, self._ORDER_EXPORT_HEADERS)
                 filename = f"orders_export_{current_date}.csv"
                 mimetype = "text/csv"
                 return output, filename, mimetype
 
             elif export_format == ExportFormat.EXCEL:
-                output = generate_excel(export_data, headers)
+                output = await generate_excel(export_data, self._ORDER_EXPORT_HEADERS)
                 filename = f"orders_export_{current_date}.xlsx"
                 mimetype = (
                     "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
@@ -88,21 +106,21 @@ class ExportService:
                 detail="Failed to export orders",
             )
 
-    def _prepare_orders_export_data(self, orders: List) -> List[Dict[str, Any]]:
+    async def _iter_orders_export_rows(
+        self, orders: AsyncIterable
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
         Подготовка данных заказов для экспорта
 
         Args:
-            orders: Список заказов
+            orders: Заказы, читаемые из БД постранично
 
-        Returns:
-            List[Dict[str, Any]]: Данные для экспорта
+        Yields:
+            Dict[str, Any]: Строка данных для экспорта
         """
-        export_data = []
-
-        for order in orders:
+        async for order in orders:
             # Базовая информация о заказе
-            order_data = {
+            yield {
                 "id": str(order.id),
                 "status": order.status,
                 "created_at": order.created_at.isoformat(),
@@ -118,35 +136,6 @@ class ExportService:
                 "user_telegram": order.user.username if order.user else "",
                 "items_count": len(order.items),
                 "items_details": ", ".join(
-                    [f"{item.product_name} (x{item.quantity})" for item in order.items]
+                    f"{item.product_name} (x{item.quantity})" for item in order.items
                 ),
             }
-
-            export_data.append(order_data)
-
-        return export_data
-
-    def _get_order_export_headers(self) -> Dict[str, str]:
-        """
-        Получение заголовков для экспорта заказов
-
-        Returns:
-            Dict[str, str]: Словарь маппинга ключей в заголовки
-        """
-        return {
-            "id": "ID заказа",
-            "status": "Статус",
-            "created_at": "Дата создания",
-            "delivery_method": "Способ доставки",
-            "delivery_address": "Адрес доставки",
-            "payment_method": "Способ оплаты",
-            "payment_status": "Статус оплаты",
-            "subtotal": "Стоимость товаров",
-            "delivery_cost": "Стоимость доставки",
-            "total": "Итого",
-            "user_id": "ID пользователя",
-            "user_name": "Имя пользователя",
-            "user_telegram": "Telegram",
-            "items_count": "Количество товаров",
-            "items_details": "Товары",
-        }
@@ -1,5 +1,6 @@
 from datetime import date, datetime, timedelta
 from decimal import Decimal
+from operator import itemgetter
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -20,6 +21,9 @@ class DiscountService:
         UserDiscountLevel.SILVER,
         UserDiscountLevel.GOLD,
     ]
+    # Позиция уровня в LEVEL_ORDER без линейного поиска по списку
+    _LEVEL_INDEX = {level: index for index, level in enumerate(LEVEL_ORDER)}
+    _MAX_LEVEL_INDEX = len(LEVEL_ORDER) - 1
 
     # Словари порогов и процентов для каждого уровня
     LEVEL_THRESHOLDS = {
@@ -32,6 +36,19 @@ class DiscountService:
         UserDiscountLevel.SILVER: Decimal(settings.SILVER_DISCOUNT_PERCENT),
         UserDiscountLevel.GOLD: Decimal(settings.GOLD_DISCOUNT_PERCENT),
     }
+    # Те же значения во float для ответов API без перевода Decimal на каждый запрос
+    _LEVEL_THRESHOLDS_F = {level: float(v) for level, v in LEVEL_THRESHOLDS.items()}
+    _LEVEL_PERCENTS_F = {level: float(v) for level, v in LEVEL_PERCENTS.items()}
+    # Уровни выше NONE как (порог, уровень, процент) в порядке LEVEL_ORDER
+    _TIERS = list(
+        zip(
+            map(LEVEL_THRESHOLDS.__getitem__, LEVEL_ORDER[1:]),
+            LEVEL_ORDER[1:],
+            map(LEVEL_PERCENTS.__getitem__, LEVEL_ORDER[1:]),
+        )
+    )
+    # Те же уровни от большего порога к меньшему для выбора уровня по сумме
+    _TIERS_DESC = sorted(_TIERS, key=itemgetter(0), reverse=True)
 
     def __init__(
         self,
@@ -48,35 +65,39 @@ class DiscountService:
         Вызывается, когда заказ переходит в статус PAID.
         Обновляет last_purchase_date и повышает уровень, если нужно.
         """
-        order = await self.order_crud.get_order(order_id)
-        if order.status != OrderStatus.PAID:
-            return
-
         today = date.today()
         month_start = today.replace(day=1)
 
-        # 1) Сумма доставленных заказов за текущий месяц
-        monthly_total: Decimal = await self.order_crud.get_monthly_total(
-            user_id, month_start
-        )
+        # 1) Статус заказа, сумма оплаченных заказов за текущий месяц
+        # и текущая скидка одним запросом
+        (
+            order_status,
+            monthly_total,
+            current_level,
+            last_purchase_date,
+        ) = await self.order_crud.fetch_paid_context(order_id, user_id, month_start)
+        if order_status != OrderStatus.PAID:
+            return
 
         # 2) Определяем новый уровень по сумме
         new_level = UserDiscountLevel.NONE
-        for level in reversed(self.LEVEL_ORDER[1:]):  # пробегаем GOLD→SILVER→BRONZE
-            threshold = self.LEVEL_THRESHOLDS[level]
+        for threshold, level, _ in self._TIERS_DESC:  # пробегаем GOLD→SILVER→BRONZE
             if monthly_total >= threshold:
                 new_level = level
                 break
 
-        # 3) Загружаем или создаём запись скидки
-        record = await self.discount_crud.get_or_create(user_id)
+        # 3) Создаём запись скидки, если её ещё нет
+        if current_level is None:
+            record = await self.discount_crud.get_or_create(user_id)
+            current_level = record.current_level
+            last_purchase_date = record.last_purchase_date
 
         # 4) Обновляем дату последней покупки, если это первая покупка в месяце
-        last_purchase = today if monthly_total > 0 else record.last_purchase_date
+        last_purchase = today if monthly_total > 0 else last_purchase_date
 
         # 5) Не занижаем достигнутый уровень, если сумма упала
-        current_index = self.LEVEL_ORDER.index(record.current_level)
-        new_index = self.LEVEL_ORDER.index(new_level)
+        current_index = self._LEVEL_INDEX[current_level]
+        new_index = self._LEVEL_INDEX[new_level]
         final_index = max(current_index, new_index)
         final_level = self.LEVEL_ORDER[final_index]
 
@@ -98,38 +119,41 @@ class DiscountService:
         """
         logger.info("Getting user discount progress", extra={"user_id": user_id})
 
-        monthly_total: Decimal = await self.order_crud.get_monthly_total(user_id)
-        record = await self.discount_crud.get_or_create(user_id)
-        current_index = self.LEVEL_ORDER.index(record.current_level)
+        # Сумма за месяц и уровень скидки одним запросом
+        monthly_total, current_level = await self.order_crud.fetch_discount_context(
+            user_id
+        )
+        if current_level is None:
+            record = await self.discount_crud.get_or_create(user_id)
+            current_level = record.current_level
+        current_index = self._LEVEL_INDEX[current_level]
 
         # Если уже на максимальном уровне
-        if current_index == len(self.LEVEL_ORDER) - 1:
-            percent = float(self.LEVEL_PERCENTS.get(record.current_level, 0))
+        if current_index == self._MAX_LEVEL_INDEX:
+            percent = self._LEVEL_PERCENTS_F.get(current_level, 0.0)
             return SUserDiscountProgress(
                 current_percent=percent,
                 current_total=float(monthly_total),
-                current_level=record.current_level,
+                current_level=current_level,
                 required_total=0,
                 amount_left=0,
-                next_level=record.current_level,
+                next_level=current_level,
                 next_percent=percent,
             )
 
         # Ищем следующий уровень
-        next_level = self.LEVEL_ORDER[current_index + 1]
-        threshold = self.LEVEL_THRESHOLDS[next_level]
+        threshold, next_level, _ = self._TIERS[current_index]
         amount_left = max(Decimal("0.0"), threshold - monthly_total)
-        next_percent = self.LEVEL_PERCENTS[next_level]
-        current_percent = float(self.LEVEL_PERCENTS.get(record.current_level, 0))
+        current_percent = self._LEVEL_PERCENTS_F.get(current_level, 0.0)
 
         return SUserDiscountProgress(
             current_percent=current_percent,
             current_total=float(monthly_total),
-            current_level=record.current_level,
-            required_total=float(threshold),
+            current_level=current_level,
+            required_total=self._LEVEL_THRESHOLDS_F[next_level],
             amount_left=float(amount_left),
             next_level=next_level,
-            next_percent=float(next_percent),
+            next_percent=self._LEVEL_PERCENTS_F[next_level],
         )
 
     async def get_current_discount_multiplier(self, user_id: UUID) -> Decimal:
@@ -153,25 +177,28 @@ class DiscountService:
         # получаем всех с текущей скидкой выше NONE
         users = await self.discount_crud.get_users_with_discount()
 
-        for record in users:
-            had_order = await self.order_crud.has_orders_in_range(
-                user_id=record.user_id,
-                start_date=prev_month_start,
-                end_date=prev_month_end,
+        # пользователи с заказами в прошлом месяце, одним запросом
+        active_user_ids = await self.order_crud.users_with_orders_in_range(
+            user_ids=[record.user_id for record in users],
+            start_date=prev_month_start,
+            end_date=prev_month_end,
+        )
+
+        # понижаем уровень остальным одним пакетным обновлением
+        level_order, level_index = self.LEVEL_ORDER, self._LEVEL_INDEX
+        demotions = [
+            (
+                record.user_id,
+                level_order[max(0, level_index[record.current_level] - 1)],
             )
-            if not had_order:
-                # понижаем уровень
-                curr_index = self.LEVEL_ORDER.index(record.current_level)
-                new_index = max(0, curr_index - 1)
-                new_level = self.LEVEL_ORDER[new_index]
-                await self.discount_crud.update_discount_level(
-                    record.user_id, new_level
-                )
+            for record in users
+            if record.user_id not in active_user_ids
+        ]
+        await self.discount_crud.bulk_update_levels(demotions)
 
     async def get_current_discount_percent(self, user_id: UUID) -> float:
         record = await self.discount_crud.get_or_create(user_id)
-        percent = self.LEVEL_PERCENTS.get(record.current_level, Decimal("0.0"))
-        return float(percent)
+        return self._LEVEL_PERCENTS_F.get(record.current_level, 0.0)
 
     async def get_discount_multiplier(self, user_id: UUID) -> Decimal:
         record = await self.discount_crud.get_or_create(user_id)
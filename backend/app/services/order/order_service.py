@@ -11,9 +11,13 @@ from app.crud.user_address import UserAddressCRUD
 from app.crud.user_delivery_point import UserDeliveryPointCRUD
 from app.models import CartItem, User, UserAddress
 from app.models.order import Order
-from app.schemas.cdek.base import RequestLocation
+from app.schemas.cdek.base import REQUEST_LOCATION_ADAPTER
 from app.schemas.cdek.response import SDeliveryPoint
 from app.schemas.order import (
+    USER_ADDRESS_ADAPTER,
+    USER_ADDRESS_LIST_ADAPTER,
+    USER_DELIVERY_POINT_ADAPTER,
+    USER_DELIVERY_POINT_LIST_ADAPTER,
     SCreateOrder,
     SOrderFilter,
     SUpdateOrderStatus,
@@ -25,13 +29,23 @@ from app.services.cdek.cdek_service import CDEKService
 from app.services.order.discount_service import DiscountService
 from app.services.promo_code_service import PromoCodeService
 from fastapi import HTTPException, status
-from pydantic import TypeAdapter, ValidationError
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class OrderService:
     """Сервис для работы с заказами"""
 
+    # Разрешенные переходы статусов заказа для пользователя
+    _STATUS_TRANSITIONS = {
+        "pending": frozenset({"cancelled"}),
+        "paid": frozenset({"processing", "cancelled"}),
+        "processing": frozenset({"shipped", "cancelled"}),
+        "shipped": frozenset({"delivered", "cancelled"}),
+        "delivered": frozenset(),
+        "cancelled": frozenset(),
+    }
+
     def __init__(
         self,
         order_crud: OrderCRUD,
@@ -98,9 +112,11 @@ class OrderService:
         elif address_id:
             address = await self.user_address_crud.get_or_none(address_id=address_id)
             if address:
-                delivery_info["delivery_to_location"] = RequestLocation.model_validate(
-                    address,
-                    from_attributes=True,
+                delivery_info["delivery_to_location"] = (
+                    REQUEST_LOCATION_ADAPTER.validate_python(
+                        address,
+                        from_attributes=True,
+                    )
                 )
                 delivery_info["delivery_comment"] = self._get_delivery_comment(address)
                 logger.debug(
@@ -181,14 +197,8 @@ class OrderService:
                 discount_multiplier=discount_multiplier,
                 delivery_method=data.delivery_method,
                 payment_method=data.payment_method,
+                applied_promo_code=applied_promo_code_obj,
             )
-            
-            if applied_promo_code_obj:
-                from app.crud.promo_code import PromoCodeCRUD
-                promo_crud = PromoCodeCRUD(self.session)
-                await promo_crud.decrement_uses(applied_promo_code_obj.id)
-                order.promo_code = applied_promo_code_obj.code
-                await self.session.commit()
 
             logger.info(
                 "Created new order",
@@ -259,34 +269,19 @@ class OrderService:
 
         try:
             from app.crud.payment import PaymentCRUD
-            from app.schemas.payment import SPaymentUpdate
 
             payment_crud = PaymentCRUD(self.session)
 
-            payments = await payment_crud.get_order_payments(order_id)
-
-            for payment in payments:
-                if payment.status not in ["succeeded", "refunded", "canceled"]:
-                    try:
-                        await payment_crud.update_payment(
-                            payment.id, SPaymentUpdate(status="canceled")
-                        )
-                        logger.info(
-                            "Payment cancelled due to order cancellation",
-                            extra={
-                                "order_id": str(order_id),
-                                "payment_id": str(payment.id),
-                            },
-                        )
-                    except Exception as e:
-                        logger.error(
-                            "Failed to cancel payment",
-                            extra={
-                                "order_id": str(order_id),
-                                "payment_id": str(payment.id),
-                                "error": str(e),
-                            },
-                        )
+            # Незавершенные платежи отменяем одним UPDATE
+            payment_ids = await payment_crud.cancel_order_payments(order_id)
+            if payment_ids:
+                logger.info(
+                    "Payments cancelled due to order cancellation",
+                    extra={
+                        "order_id": str(order_id),
+                        "payment_ids": [str(payment_id) for payment_id in payment_ids],
+                    },
+                )
         except Exception as e:
             logger.error(
                 "Failed to process payments cancellation",
@@ -382,8 +377,8 @@ class OrderService:
                 status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
             )
 
-        if not admin and data.status not in self._get_allowed_status_transitions(
-            order.status
+        if not admin and data.status not in self._STATUS_TRANSITIONS.get(
+            order.status, frozenset()
         ):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -429,50 +424,26 @@ class OrderService:
             skip=skip, limit=limit, filters=filter_dict
         )
 
-    def _get_allowed_status_transitions(self, current_status: str) -> List[str]:
-        """
-        Получение списка разрешенных статусов для перехода
-
-        Args:
-            current_status: Текущий статус
-
-        Returns:
-            List[str]: Список разрешенных статусов
-        """
-        transitions = {
-            "pending": ["cancelled"],
-            "paid": ["processing", "cancelled"],
-            "processing": ["shipped", "cancelled"],
-            "shipped": ["delivered", "cancelled"],
-            "delivered": [],
-            "cancelled": [],
-        }
-
-        return transitions.get(current_status, [])
-
     async def process_ready_for_shipping_orders(self) -> None:
         """
         Обработка заказов, готовых к отгрузке
         Должна вызываться периодически через задачу планировщика
         """
-        orders = await self.order_crud.get_orders_for_shipping()
-
-        for order in orders:
-            try:
-                await self.update_order_status(
-                    order.id, SUpdateOrderStatus(status="shipped"), admin=True
-                )
-
+        # Все готовые заказы переводим в статус "отправлен" одним UPDATE
+        try:
+            order_ids = await self.order_crud.ship_ready_orders()
+            if order_ids:
                 logger.info(
-                    "Processed order for shipping", extra={"order_id": str(order.id)}
+                    "Processed orders for shipping",
+                    extra={"order_ids": [str(order_id) for order_id in order_ids]},
                 )
 
-            except Exception as e:
-                logger.error(
-                    "Failed to process order for shipping",
-                    extra={"order_id": str(order.id), "error": str(e)},
-                    exc_info=True,
-                )
+        except Exception as e:
+            logger.error(
+                "Failed to process orders for shipping",
+                extra={"error": str(e)},
+                exc_info=True,
+            )
 
     async def save_user_delivery_point(
         self,
@@ -486,7 +457,7 @@ class OrderService:
             user,
             cdek_delivery_point,
         )
-        return SUserDeliveryPoint.model_validate(
+        return USER_DELIVERY_POINT_ADAPTER.validate_python(
             user_delivery_point,
             from_attributes=True,
         )
@@ -495,7 +466,7 @@ class OrderService:
         self,
         user: User,
     ) -> list[Optional[SUserDeliveryPoint]]:
-        return TypeAdapter(list[SUserDeliveryPoint]).validate_python(
+        return USER_DELIVERY_POINT_LIST_ADAPTER.validate_python(
             await self.user_delivery_point_crud.get_all(user),
             from_attributes=True,
         )
@@ -518,7 +489,7 @@ class OrderService:
         user: User,
         user_address: SUserAddress,
     ) -> SUserAddress:
-        return SUserAddress.model_validate(
+        return USER_ADDRESS_ADAPTER.validate_python(
             await self.user_address_crud.create(user, user_address),
             from_attributes=True,
         )
@@ -527,7 +498,7 @@ class OrderService:
         self,
         user: User,
     ) -> list[Optional[SUserAddress]]:
-        return TypeAdapter(list[SUserAddress]).validate_python(
+        return USER_ADDRESS_LIST_ADAPTER.validate_python(
             await self.user_address_crud.get_all(user),
             from_attributes=True,
         )
@@ -567,7 +538,9 @@ class OrderService:
             ) from e
 
         try:
-            result = SUserAddress.model_validate(updated_address, from_attributes=True)
+            result = USER_ADDRESS_ADAPTER.validate_python(
+                updated_address, from_attributes=True
+            )
         except ValidationError as e:
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -25,7 +25,7 @@ from app.services.telegram.bot_manager import TelegramBotManager
 from fastapi import HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 
 class PaymentService:
@@ -410,7 +410,7 @@ class PaymentService:
 
     async def _process_successful_payment(self, payment: Payment) -> None:
         """Обработка успешного платежа"""
-        from app.models.order import Order
+        from app.models.order import Order, OrderItem
         from app.models.order_status import OrderStatus
         from app.models.user import User
         from sqlalchemy import update
@@ -420,7 +420,9 @@ class PaymentService:
             .options(
                 joinedload(Order.user).options(
                     joinedload(User.referral).options(joinedload(Referral.referrer))
-                )
+                ),
+                # Позиции с товарами нужны для упаковок заказа СДЭК
+                selectinload(Order.items).selectinload(OrderItem.product),
             )
             .where(Order.id == payment.order_id)
         )
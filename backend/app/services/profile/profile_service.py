@@ -1,13 +1,12 @@
 from typing import Optional
 from uuid import UUID
 
-from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.logger import logger
 from app.crud.user_profile import UserProfileCRUD
 from app.models.user import UserProfile
-from app.schemas.user import SUserProfile
+from app.schemas.user import USER_PROFILE_ADAPTER, SUserProfile
 
 
 class ProfileService:
@@ -19,7 +18,10 @@ class ProfileService:
         """
         Возвращает профиль пользователя, создавая его, если ещё нет.
         """
-        return SUserProfile.model_validate(await self.crud.get_or_create(user_id))
+        return USER_PROFILE_ADAPTER.validate_python(
+            await self.crud.get_or_create(user_id),
+            from_attributes=True,
+        )
 
     async def update_profile(
         self,
@@ -38,13 +40,14 @@ class ProfileService:
                 "email": email,
             },
         )
-        return SUserProfile.model_validate(
+        return USER_PROFILE_ADAPTER.validate_python(
             await self.crud.update(
                 user_id,
                 full_name=full_name,
                 phone_number=phone_number,
                 email=email,
-            )
+            ),
+            from_attributes=True,
         )
 
     async def update_name(self, user_id: UUID, full_name: str) -> SUserProfile:
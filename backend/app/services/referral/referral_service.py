@@ -21,6 +21,7 @@ from app.enums.referral import ReferralPayoutStatus
 from app.models import Order, User
 from app.models.order_status import OrderStatus
 from app.schemas.referral import (
+    PAYOUT_REQUEST_ADAPTER,
     ReferralLinkPayload,
     SReferral,
     SReferralListPaginated,
@@ -367,7 +368,9 @@ class ReferralService:
         user.user.bonus_balance -= Decimal(data.amount)
         await self.session.commit()
 
-        return SReferralPayoutRequest.model_validate(new_request, from_attributes=True)
+        return PAYOUT_REQUEST_ADAPTER.validate_python(
+            new_request, from_attributes=True
+        )
 
     async def get_payout_requests(
         self,
@@ -442,16 +445,17 @@ class ReferralService:
             full_name=new_request.referrer.user.full_name,
         )
 
-        return SReferralPayoutRequest.model_validate(data)
+        return PAYOUT_REQUEST_ADAPTER.validate_python(data)
 
     async def reject_payout_request(self, request_id: UUID) -> SReferralPayoutRequest:
         logger.info(
             "Rejecting payout request",
             extra={"request_id": request_id},
         )
-        return SReferralPayoutRequest.model_validate(
+        return PAYOUT_REQUEST_ADAPTER.validate_python(
             await self.payout_request_crud.update_status(
                 request_id,
                 ReferralPayoutStatus.REJECTED,
-            )
+            ),
+            from_attributes=True,
         )
@@ -8,5 +8,6 @@ scheduler = AsyncIOScheduler(
 )
 
 from . import (
+    expired_carts_cleanup,
     monthly_discount_decay,
 )
@@ -0,0 +1,13 @@
+from apscheduler.triggers.interval import IntervalTrigger
+
+from app.api.deps import get_cart_service
+from app.core.db import async_session
+from app.services.scheduler import scheduler
+
+
+@scheduler.scheduled_job(IntervalTrigger(minutes=1))
+async def expired_carts_cleanup_task():
+    # Деактивация просроченных корзин снимает их резервы в products.reserved_quantity
+    async with async_session() as session:
+        service = await get_cart_service(session=session)
+        await service.cleanup_expired_carts()
@@ -1,3 +1,4 @@
+import base64
 import hashlib
 import json
 from enum import Enum
@@ -9,7 +10,9 @@ def redis_key(base: str, params: dict | None = None, use_hash: bool = False) ->
         return base
     params_str = json.dumps(params, sort_keys=True, separators=(",", ":"))
     if use_hash:
-        params_str = hashlib.md5(params_str.encode()).hexdigest()
+        # blake2b-128 в base32 короче hex-представления md5: 26 символов вместо 32
+        digest = hashlib.blake2b(params_str.encode(), digest_size=16).digest()
+        params_str = base64.b32encode(digest).decode().rstrip("=").lower()
     return f"{base}:{params_str}"
 
 
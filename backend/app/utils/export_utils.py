@@ -1,19 +1,21 @@
 # app/utils/export_utils.py
 import csv
 import io
-from typing import Any, Dict, List
+from typing import Any, AsyncIterable, Dict
 
-import pandas as pd
+from openpyxl import Workbook
 
 from app.core.logger import logger
 
 
-def generate_csv(data: List[Dict[str, Any]], headers: Dict[str, str]) -> io.StringIO:
+async def generate_csv(
+    data: AsyncIterable[Dict[str, Any]], headers: Dict[str, str]
+) -> io.StringIO:
     """
     Генерация CSV файла из данных
 
     Args:
-        data: Список словарей с данными
+        data: Строки с данными, читаются по мере записи
         headers: Словарь соответствия ключей заголовкам
 
     Returns:
@@ -25,37 +27,45 @@ def generate_csv(data: List[Dict[str, Any]], headers: Dict[str, str]) -> io.Stri
     # Записываем заголовки
     writer.writerow(headers)
 
-    # Записываем данные
-    for row in data:
+    # Записываем данные построчно, не накапливая их в памяти
+    rows_count = 0
+    async for row in data:
         writer.writerow(row)
+        rows_count += 1
 
     output.seek(0)
-    logger.info(f"Generated CSV file with {len(data)} rows")
+    logger.info(f"Generated CSV file with {rows_count} rows")
     return output
 
 
-def generate_excel(data: List[Dict[str, Any]], headers: Dict[str, str]) -> io.BytesIO:
+async def generate_excel(
+    data: AsyncIterable[Dict[str, Any]], headers: Dict[str, str]
+) -> io.BytesIO:
     """
     Генерация Excel файла из данных
 
     Args:
-        data: Список словарей с данными
+        data: Строки с данными, читаются по мере записи
         headers: Словарь соответствия ключей заголовкам
 
     Returns:
         io.BytesIO: Буфер с Excel данными
     """
-    # Создаем DataFrame из данных
-    df = pd.DataFrame(data)
+    # В режиме write_only строки пишутся сразу, без модели всего листа в памяти
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Orders")
+    sheet.append(list(headers.values()))
 
-    # Переименовываем колонки в соответствии с заголовками
-    df = df.rename(columns=headers)
+    keys = list(headers.keys())
+    rows_count = 0
+    async for row in data:
+        sheet.append([row.get(key) for key in keys])
+        rows_count += 1
 
     # Записываем в буфер
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Orders")
+    workbook.save(output)
 
     output.seek(0)
-    logger.info(f"Generated Excel file with {len(data)} rows")
+    logger.info(f"Generated Excel file with {rows_count} rows")
     return output
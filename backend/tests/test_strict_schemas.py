@@ -0,0 +1,177 @@
+import json
+from uuid import UUID, uuid4
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.cdek.enums import DeliveryMode, RequestState
+from app.schemas.cdek.response import (
+    OAuthTokenResponse,
+    OrderCreationResponse,
+    OrderInfoResponse,
+    TariffListResponse,
+)
+from app.schemas.payment import SPaymentResponse
+
+TOKEN_DATA = {
+    "access_token": "token",
+    "token_type": "bearer",
+    "scope": "order:all",
+    "jti": "jti",
+}
+
+# Ответы CDEK в том виде, в котором они приходят по сети: UUID и даты строками
+CITY_UUID = "7e50f7b6-7a4a-4c2c-9a4a-9b2b2a0c4b11"
+ORDER_UUID = "72753031-6c3b-4d4b-9f5f-1f0a3ad2b5d1"
+REQUEST_UUID = "b1c1d5f0-0d5e-4c6a-8f3f-2b7e6d9a1c22"
+
+TARIFF_LIST_JSON = json.dumps(
+    {
+        "tariff_codes": [
+            {
+                "tariff_code": 136,
+                "tariff_name": "Посылка склад-склад",
+                "tariff_description": "Услуга экономичной доставки товаров",
+                "delivery_mode": 4,
+                "delivery_sum": 290.0,
+                "period_min": 2,
+                "period_max": 3,
+                "calendar_min": 2,
+                "calendar_max": 3,
+            }
+        ]
+    }
+)
+
+ORDER_CREATION_JSON = json.dumps(
+    {
+        "entity": {"uuid": ORDER_UUID},
+        "requests": [
+            {
+                "request_uuid": REQUEST_UUID,
+                "type": "CREATE",
+                "date_time": "2024-05-20T12:15:10+0000",
+                "state": "ACCEPTED",
+            }
+        ],
+    }
+)
+
+ORDER_INFO_JSON = json.dumps(
+    {
+        "entity": {
+            "uuid": ORDER_UUID,
+            "type": 1,
+            "is_return": False,
+            "is_reverse": False,
+            "cdek_number": "1106207236",
+            "number": "a1b2c3d4",
+            "tariff_code": 136,
+            "delivery_point": "MSK2287",
+            "recipient": {
+                "name": "Иванов Иван",
+                "phones": [{"number": "+79134000101"}],
+            },
+            "from_location": {
+                "code": "44",
+                "city_uuid": CITY_UUID,
+                "city": "Москва",
+                "country_code": "RU",
+                "country": "Россия",
+                "region": "Москва",
+                "region_code": 81,
+                "longitude": 37.6204,
+                "latitude": 55.754,
+                "address": "ул. Блюхера, 32",
+            },
+            "packages": [
+                {
+                    "number": "1",
+                    "weight": 1000,
+                    "items": [
+                        {
+                            "name": "Товар",
+                            "ware_key": "00055",
+                            "payment": {"value": 0},
+                            "cost": 1500.0,
+                            "weight": 500,
+                            "amount": 2,
+                        }
+                    ],
+                }
+            ],
+            "statuses": [
+                {
+                    "code": "CREATED",
+                    "name": "Создан",
+                    "date_time": "2024-05-20T12:15:10+0000",
+                    "city": "Москва",
+                    "city_uuid": CITY_UUID,
+                    "deleted": False,
+                }
+            ],
+            "is_client_return": False,
+            "delivery_mode": "4",
+            "planned_delivery_date": "2024-05-25",
+        },
+        "requests": [
+            {
+                "request_uuid": REQUEST_UUID,
+                "type": "GET",
+                "date_time": "2024-05-20T12:20:00+0000",
+                "state": "SUCCESSFUL",
+            }
+        ],
+    }
+)
+
+
+def test_payment_response_rejects_uuid_string():
+    """В строгом режиме строка не приводится к UUID при валидации python-объектов"""
+    with pytest.raises(ValidationError):
+        SPaymentResponse(payment_id=str(uuid4()), status="pending")
+
+
+def test_payment_response_parses_json():
+    payment_id = uuid4()
+
+    payment = SPaymentResponse.model_validate_json(
+        f'{{"payment_id": "{payment_id}", "status": "pending"}}'
+    )
+
+    assert payment.payment_id == payment_id
+
+
+def test_oauth_token_response_rejects_numeric_string():
+    with pytest.raises(ValidationError):
+        OAuthTokenResponse.model_validate({**TOKEN_DATA, "expires_in": "3600"})
+
+
+def test_oauth_token_response_parses_json():
+    token = OAuthTokenResponse.model_validate_json(
+        '{"access_token": "token", "token_type": "bearer", "expires_in": 3600,'
+        ' "scope": "order:all", "jti": "jti"}'
+    )
+
+    assert token.expires_in == 3600
+
+
+def test_tariff_list_response_parses_cdek_json():
+    tariffs = TariffListResponse.model_validate_json(TARIFF_LIST_JSON)
+
+    assert tariffs.tariff_codes[0].delivery_mode is DeliveryMode.WAREHOUSE_TO_WAREHOUSE
+
+
+def test_order_creation_response_parses_cdek_json():
+    order = OrderCreationResponse.model_validate_json(ORDER_CREATION_JSON)
+
+    assert order.entity.uuid == UUID(ORDER_UUID)
+    assert order.requests[0].state is RequestState.ACCEPTED
+
+
+def test_order_info_response_parses_cdek_json():
+    order = OrderInfoResponse.model_validate_json(ORDER_INFO_JSON)
+
+    assert order.entity.uuid == UUID(ORDER_UUID)
+    assert order.entity.statuses[0].city_uuid == UUID(CITY_UUID)
+    assert order.entity.planned_delivery_date.year == 2024